@@ -0,0 +1,152 @@
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import User
+
+from .metrics import cache_requests
+
+USER_CACHE_KEY = 'auth:user:{}'
+USER_CHANGED_KEY = 'auth:user_changed:{}'
+ROLE_CLAIMS = ('username', 'role', 'is_superuser')
+
+
+def get_access_token(user):
+    """Выпускает токен доступа с данными пользователя, которых
+    достаточно для проверки прав без запроса к базе."""
+    if not user._state.adding:
+        remember_changed_at(user)
+    token = AccessToken.for_user(user)
+    token['username'] = user.username
+    token['role'] = user.role
+    token['is_superuser'] = user.is_superuser
+    return token
+
+
+def get_cached_user(user_id):
+    """Возвращает пользователя из кэша или из базы, None если его нет."""
+    key = USER_CACHE_KEY.format(user_id)
+    user = cache.get(key)
+    if user is not None:
+        cache_requests.inc(cache='auth_user', result='hit')
+        return user
+    cache_requests.inc(cache='auth_user', result='miss')
+    user = User.objects.filter(pk=user_id).first()
+    if user is not None:
+        cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+    return user
+
+
+def timestamp(value):
+    return value.timestamp() if value is not None else 0
+
+
+def remember_changed_at(user):
+    """Кладет в кэш время изменения уже загруженного пользователя,
+    если его там еще нет."""
+    cache.add(
+        USER_CHANGED_KEY.format(user.pk), timestamp(user.changed_at),
+        settings.AUTH_USER_CACHE_TIMEOUT
+    )
+
+
+def get_changed_at(user_id):
+    """Время последнего изменения пользователя в секундах эпохи:
+    из кэша, а при его отсутствии - из базы. Для удаленного
+    пользователя - бесконечность.
+
+    Время хранится в базе, поэтому отзыв токенов не зависит от того,
+    в каком процессе изменили пользователя и не вытеснен ли ключ
+    из кэша: другие процессы увидят изменение не позже чем через
+    AUTH_USER_CACHE_TIMEOUT секунд."""
+    key = USER_CHANGED_KEY.format(user_id)
+    changed_at = cache.get(key)
+    if changed_at is not None:
+        return changed_at
+    row = User.objects.filter(pk=user_id).values_list('changed_at').first()
+    changed_at = math.inf if row is None else timestamp(row[0])
+    cache.set(key, changed_at, settings.AUTH_USER_CACHE_TIMEOUT)
+    return changed_at
+
+
+def user_changed(user_id, changed_at):
+    """Сбрасывает кэш пользователя и помечает выпущенные ему раньше
+    токены: данные о роли из них больше не используются."""
+    cache.delete(USER_CACHE_KEY.format(user_id))
+    cache.set(
+        USER_CHANGED_KEY.format(user_id), changed_at,
+        settings.AUTH_USER_CACHE_TIMEOUT
+    )
+
+
+class RoleTokenUser(TokenUser):
+    """Пользователь, восстановленный из данных токена без запроса к базе."""
+
+    @cached_property
+    def role(self):
+        return self.token.get('role', User.USER)
+
+    @property
+    def is_admin(self):
+        return self.role == User.ADMIN or self.is_superuser
+
+    @property
+    def is_moderator(self):
+        return self.role == User.MODERATOR
+
+    @property
+    def is_user(self):
+        return self.role == User.USER
+
+    def get_db_user(self):
+        return get_cached_user(self.id)
+
+
+def get_db_user(user):
+    """Возвращает объект модели User для записи в базу, например,
+    в качестве автора отзыва. Если пользователя удалили после
+    проверки токена, запрос отклоняется."""
+    if not isinstance(user, RoleTokenUser):
+        return user
+    db_user = user.get_db_user()
+    if db_user is None:
+        raise AuthenticationFailed('User not found', code='user_not_found')
+    return db_user
+
+
+class RoleJWTAuthentication(JWTAuthentication):
+    """Аутентификация по JWT без запроса к базе на каждый запрос.
+
+    Если токен выпущен get_access_token и пользователь после этого
+    не менялся, возвращается RoleTokenUser. Иначе пользователь берется
+    из кэша, а при его отсутствии - из базы."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise AuthenticationFailed(
+                'Token contained no recognizable user identification'
+            )
+        if (all(claim in validated_token for claim in ROLE_CLAIMS)
+                and not self.is_outdated(validated_token, user_id)):
+            return RoleTokenUser(validated_token)
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        if not user.is_active:
+            raise AuthenticationFailed(
+                'User is inactive', code='user_inactive'
+            )
+        return user
+
+    def is_outdated(self, validated_token, user_id):
+        return get_changed_at(user_id) >= validated_token['iat']
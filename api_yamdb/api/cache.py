@@ -0,0 +1,151 @@
+import threading
+import time
+from hashlib import md5
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+from .metrics import cache_requests
+
+GENERATION_KEY = 'response_cache:generation:{}'
+MODIFIED_KEY = 'response_cache:modified:{}'
+RESPONSE_KEY = 'response_cache:response:{}'
+LOCK_KEY = 'response_cache:lock:{}'
+LOCK_POLL_INTERVAL = 0.05
+CACHED_HEADERS = ('ETag', 'Last-Modified')
+CONDITIONAL_META = ('HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE')
+
+
+class CacheStats:
+    """Счетчики попаданий и промахов кэша ответов в текущем процессе."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self):
+        with self._lock:
+            self.hits += 1
+        cache_requests.inc(cache='response', result='hit')
+
+    def miss(self):
+        with self._lock:
+            self.misses += 1
+        cache_requests.inc(cache='response', result='miss')
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+stats = CacheStats()
+
+
+def generation_key(model):
+    return GENERATION_KEY.format(model._meta.label_lower)
+
+
+def get_generations(models):
+    """Возвращает текущие поколения моделей, от которых зависит ответ."""
+    keys = [generation_key(model) for model in models]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            # Начальное значение берется из времени, чтобы после вытеснения
+            # ключа из кэша поколение не вернулось к уже использованному.
+            cache.add(key, time.time_ns(), None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def get_last_modified(models):
+    """Время последнего изменения переданных моделей в секундах."""
+    keys = [MODIFIED_KEY.format(model._meta.label_lower) for model in models]
+    modified = cache.get_many(keys)
+    for key in keys:
+        if key not in modified:
+            # Время изменения неизвестно: считаем, что модель изменилась
+            # сейчас, чтобы не ответить 304 на устаревшую копию.
+            cache.add(key, time.time(), None)
+            modified[key] = cache.get(key)
+    return max(modified.values(), default=None)
+
+
+def bump_generation(*models):
+    """Делает недействительными все закэшированные ответы,
+    зависящие от переданных моделей."""
+    now = time.time()
+    for model in models:
+        key = generation_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+        cache.set(MODIFIED_KEY.format(model._meta.label_lower), now, None)
+
+
+def get_response_key(request, models):
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    generations = get_generations(models)
+    digest = md5(
+        f'{request.path}?{query}:{generations}'.encode()
+    ).hexdigest()
+    return RESPONSE_KEY.format(digest)
+
+
+def cached_response(request, models, view_func, *args, **kwargs):
+    """Возвращает ответ из кэша или вызывает view_func и кэширует
+    успешный ответ вместе с заголовками CACHED_HEADERS.
+
+    Условные запросы идут мимо кэша в view_func, которая сама решает,
+    можно ли ответить 304. Пока один запрос строит ответ, остальные
+    с тем же ключом ждут его в кэше не дольше RESPONSE_CACHE_LOCK_TIMEOUT
+    секунд, а не идут в базу одновременно."""
+    key = get_response_key(request, models)
+    conditional = any(header in request.META for header in CONDITIONAL_META)
+    if not conditional:
+        cached = cache.get(key)
+        if cached is not None:
+            stats.hit()
+            return build_response(cached)
+    stats.miss()
+
+    lock_key = LOCK_KEY.format(key)
+    locked = conditional or cache.add(
+        lock_key, 1, settings.RESPONSE_CACHE_LOCK_TIMEOUT
+    )
+    if not locked:
+        deadline = time.monotonic() + settings.RESPONSE_CACHE_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            cached = cache.get(key)
+            if cached is not None:
+                return build_response(cached)
+    try:
+        response = view_func(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            headers = {
+                header: response[header] for header in CACHED_HEADERS
+                if response.has_header(header)
+            }
+            cache.set(key, (response.data, headers),
+                      settings.RESPONSE_CACHE_TIMEOUT)
+    finally:
+        if locked and not conditional:
+            cache.delete(lock_key)
+    return response
+
+
+def build_response(cached):
+    data, headers = cached
+    return Response(data, headers=headers)
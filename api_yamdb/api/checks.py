@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Кэши, которые каждый процесс держит у себя.
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Поколения моделей в кэше служат валидаторами ETag и
+    Last-Modified: в локальном кэше процесса они расходятся между
+    воркерами, и клиент получает 304 на устаревшие данные."""
+    backend = settings.CACHES['default']['BACKEND']
+    if backend not in LOCAL_CACHE_BACKENDS:
+        return []
+    return [Error(
+        f'Кэш {backend} не общий для процессов сервера.',
+        hint='Укажите в CACHES общий кэш, например Redis или Memcached.',
+        id='api.E001',
+    )]
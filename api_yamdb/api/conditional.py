@@ -0,0 +1,36 @@
+from hashlib import md5
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .cache import get_generations, get_last_modified
+
+
+def get_validators(request, models):
+    """Возвращает ETag и время последнего изменения данных ответа.
+
+    Оба значения берутся из кэша по поколениям и времени изменения
+    моделей, от которых зависит ответ, без запросов к базе. Поколения
+    меняются сигналами при любом изменении, в том числе при удалении
+    объектов и изменении вложенных в ответ моделей."""
+    etag = md5(
+        f'{request.get_full_path()}:{get_generations(models)}'.encode()
+    ).hexdigest()
+    return quote_etag(etag), get_last_modified(models)
+
+
+def conditional_response(request, models, view_func, *args, **kwargs):
+    """Отвечает 304 на условный GET, если данные не менялись,
+    иначе вызывает view_func и добавляет к ответу ETag и Last-Modified."""
+    etag, last_modified = get_validators(request, models)
+    timestamp = int(last_modified) if last_modified is not None else None
+    response = get_conditional_response(
+        request, etag=etag, last_modified=timestamp
+    )
+    if response is None:
+        response = view_func(request, *args, **kwargs)
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+    return response
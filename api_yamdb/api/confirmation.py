@@ -0,0 +1,82 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.http import base36_to_int, int_to_base36
+
+from users.models import User
+
+from .authentication import get_changed_at, remember_changed_at
+
+CODE_KEY = 'confirmation_code:{}'
+USED_KEY = 'confirmation_code:used:{}:{}'
+KEY_SALT = 'api.confirmation.code'
+MAC_LENGTH = 12
+CLAIM_FIELDS = ('id', 'username', 'role', 'is_superuser')
+
+
+def get_mac(claims, issued):
+    value = ':'.join(str(claims[field]) for field in CLAIM_FIELDS)
+    return salted_hmac(
+        KEY_SALT, f'{value}:{issued}', algorithm='sha256'
+    ).hexdigest()[:MAC_LENGTH]
+
+
+def issue_code(user):
+    """Выпускает код подтверждения вида '<время в base36>-<подпись>'.
+
+    Подпись покрывает id, username и роль пользователя, поэтому после
+    их изменения код перестает подходить. Данные пользователя кладутся
+    в кэш на CONFIRMATION_CODE_TIMEOUT секунд, чтобы gettoken проверял
+    код без запроса к базе."""
+    claims = {field: getattr(user, field) for field in CLAIM_FIELDS}
+    remember_changed_at(user)
+    issued = int(time.time())
+    cache.set(
+        CODE_KEY.format(user.username), {**claims, 'issued': issued},
+        settings.CONFIRMATION_CODE_TIMEOUT
+    )
+    return f'{int_to_base36(issued)}-{get_mac(claims, issued)}'
+
+
+def get_claims(username):
+    """Данные пользователя для проверки кода: из кэша, если после
+    выпуска кода пользователь не менялся, иначе из базы."""
+    claims = cache.get(CODE_KEY.format(username))
+    if claims is not None and get_changed_at(claims['id']) < claims['issued']:
+        return claims
+    return User.objects.filter(
+        username=username
+    ).values(*CLAIM_FIELDS).first()
+
+
+def parse_code(code):
+    issued, _, mac = str(code).partition('-')
+    try:
+        return base36_to_int(issued), mac
+    except ValueError:
+        return None, None
+
+
+def consume_code(claims, code):
+    """Проверяет код и помечает его использованным.
+
+    Метка ставится через cache.add, поэтому из одновременных запросов
+    с одним кодом токен получит только один."""
+    issued, mac = parse_code(code)
+    if issued is None:
+        return False
+    if time.time() - issued > settings.CONFIRMATION_CODE_TIMEOUT:
+        return False
+    if not constant_time_compare(mac, get_mac(claims, issued)):
+        return False
+    return cache.add(
+        USED_KEY.format(claims['username'], issued), True,
+        settings.CONFIRMATION_CODE_TIMEOUT
+    )
+
+
+def get_token_user(claims):
+    """Несохраняемый объект User с данными, нужными get_access_token."""
+    return User(**{field: claims[field] for field in CLAIM_FIELDS})
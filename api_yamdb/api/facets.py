@@ -0,0 +1,88 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F
+from rest_framework import serializers
+
+from reviews.models import Category, Genre, Title
+
+from .cache import get_generations
+from .filters import get_slug_map
+
+FACETS_KEY = 'facets:{}'
+DECADE = 10
+
+
+def invert(slug_map):
+    return {pk: slug for slug, pk in slug_map.items()}
+
+
+def count_genres(queryset):
+    slugs = invert(get_slug_map(Genre))
+    rows = Title.genre.through.objects.filter(
+        title_id__in=queryset.values('pk')
+    ).values('genre_id').annotate(count=Count('title_id')).order_by()
+    return {
+        slugs[row['genre_id']]: row['count'] for row in rows
+        if row['genre_id'] in slugs
+    }
+
+
+def count_categories(queryset):
+    slugs = invert(get_slug_map(Category))
+    rows = queryset.exclude(category_id=None).values(
+        'category_id'
+    ).annotate(count=Count('pk')).order_by()
+    return {
+        slugs[row['category_id']]: row['count'] for row in rows
+        if row['category_id'] in slugs
+    }
+
+
+def count_decades(queryset):
+    # Деление целых чисел в SQL отбрасывает остаток.
+    rows = queryset.values(
+        decade=F('year') / DECADE * DECADE
+    ).annotate(count=Count('pk')).order_by('decade')
+    return {row['decade']: row['count'] for row in rows}
+
+
+FACETS = {
+    'genre': count_genres,
+    'category': count_categories,
+    'year': count_decades,
+}
+
+
+def parse_facets(value):
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = set(names) - set(FACETS)
+    if unknown:
+        raise serializers.ValidationError({'facets': (
+            f'Неизвестные фасеты: {", ".join(sorted(unknown))}. '
+            f'Доступны: {", ".join(FACETS)}.'
+        )})
+    return names
+
+
+def get_facets(queryset, names):
+    """Количество произведений из queryset по жанрам, категориям
+    и десятилетиям: по одному запросу с GROUP BY на фасет.
+
+    Результат кэшируется по тексту запроса queryset, то есть по набору
+    фильтров, и поколениям моделей: страницы и разные наборы фасетов
+    одной выборки используют общие значения."""
+    queryset = queryset.order_by()
+    signature = md5('{}:{}'.format(
+        queryset.query, get_generations((Title, Genre, Category))
+    ).encode()).hexdigest()
+    keys = {name: FACETS_KEY.format(f'{name}:{signature}') for name in names}
+    facets = cache.get_many(keys.values())
+    result = {}
+    for name, key in keys.items():
+        if key not in facets:
+            facets[key] = FACETS[name](queryset)
+            cache.set(key, facets[key], settings.RESPONSE_CACHE_TIMEOUT)
+        result[name] = facets[key]
+    return result
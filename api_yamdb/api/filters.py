@@ -1,19 +1,86 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
 from django_filters import rest_framework as filters
 
-from reviews.models import Title
+from reviews.models import Category, Genre, Title
+from reviews.search import build_query
+
+from .cache import get_generations
+
+SLUG_MAP_KEY = 'slug_map:{}:{}'
+MATCH_ANY = 'any'
+MATCH_ALL = 'all'
+
+
+def get_slug_map(model):
+    """Словарь slug -> id модели из кэша.
+
+    Ключ включает поколение модели, поэтому после изменения жанров
+    или категорий словарь загружается заново одним запросом."""
+    generation, = get_generations([model])
+    key = SLUG_MAP_KEY.format(model._meta.label_lower, generation)
+    slugs = cache.get(key)
+    if slugs is None:
+        slugs = dict(model.objects.values_list('slug', 'pk'))
+        cache.set(key, slugs, settings.SLUG_MAP_CACHE_TIMEOUT)
+    return slugs
+
+
+def resolve_slugs(model, value):
+    """Возвращает id объектов для slug через запятую и признак того,
+    что все slug существуют."""
+    slugs = {slug.strip() for slug in value.split(',') if slug.strip()}
+    slug_map = get_slug_map(model)
+    ids = {slug_map[slug] for slug in slugs if slug in slug_map}
+    return ids, len(ids) == len(slugs)
 
 
 class FilterForTitles(filters.FilterSet):
-    """Фильтр для вьюсета TitleViewSet."""
+    """Фильтр для вьюсета TitleViewSet.
+
+    genre и category принимают один или несколько slug через запятую
+    и фильтруют по id без JOIN с таблицами жанров и категорий. Для
+    нескольких жанров genre_mode=any (по умолчанию) оставляет
+    произведения хотя бы с одним из них, genre_mode=all - со всеми."""
 
     name = filters.CharFilter(field_name='name', lookup_expr='icontains')
-    category = filters.CharFilter(
-        field_name='category__slug', lookup_expr='icontains'
-    )
-    genre = filters.CharFilter(
-        field_name='genre__slug', lookup_expr='icontains'
+    category = filters.CharFilter(method='filter_category')
+    genre = filters.CharFilter(method='filter_genre')
+    genre_mode = filters.ChoiceFilter(
+        choices=((MATCH_ANY, MATCH_ANY), (MATCH_ALL, MATCH_ALL)),
+        method='filter_mode',
     )
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
-        fields = ['name', 'year', 'genre', 'category']
+        fields = ['name', 'year', 'genre', 'category', 'search']
+
+    def filter_category(self, queryset, name, value):
+        ids, _ = resolve_slugs(Category, value)
+        return queryset.filter(category_id__in=ids)
+
+    def filter_genre(self, queryset, name, value):
+        ids, found_all = resolve_slugs(Genre, value)
+        genre_titles = Title.genre.through.objects.filter(genre_id__in=ids)
+        if self.data.get('genre_mode') == MATCH_ALL:
+            if not found_all:
+                return queryset.none()
+            # Пара (title, genre) уникальна, поэтому число строк
+            # произведения равно числу найденных у него жанров.
+            genre_titles = genre_titles.values('title_id').annotate(
+                genres_number=Count('genre_id')
+            ).filter(genres_number=len(ids))
+        # Подзапрос вместо JOIN не размножает строки произведений.
+        return queryset.filter(pk__in=genre_titles.values('title_id'))
+
+    def filter_mode(self, queryset, name, value):
+        return queryset
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск по названию и описанию."""
+        query = build_query(value)
+        if query is None:
+            return queryset
+        return queryset.filter(search_index__document__match=query)
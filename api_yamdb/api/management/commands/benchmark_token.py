@@ -0,0 +1,105 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from api.authentication import get_access_token
+from api.confirmation import issue_code
+from api.serializers import TokenJWTSerializer
+from api.views import gettoken
+from users.models import User
+
+URL = '/api/v1/auth/token/'
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def legacy_gettoken(request):
+    """Прежняя реализация gettoken: пользователь из базы и проверка
+    кода через default_token_generator."""
+    serializer = TokenJWTSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+    try:
+        user = User.objects.get(username=data['username'])
+    except User.DoesNotExist:
+        return Response(status=status.HTTP_404_NOT_FOUND)
+    if default_token_generator.check_token(user, data['confirmation_code']):
+        token = get_access_token(user)
+        return Response({'token': str(token)}, status=status.HTTP_200_OK)
+    return Response(status=status.HTTP_400_BAD_REQUEST)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+
+    help = ('Compares requests per second of the token endpoint with '
+            'cached confirmation codes and with default_token_generator. '
+            'Test users are created in a transaction that is rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Number of token requests per mode, one user each.',
+        )
+
+    def handle(self, *args, **options):
+        # Без снятия лимитов gettoken отвечал бы 429 почти на все запросы.
+        unlimited = {scope: {} for scope in settings.THROTTLE_RATES}
+        try:
+            with transaction.atomic(), override_settings(
+                THROTTLE_RATES=unlimited
+            ):
+                users = self.create_users(options['requests'])
+                self.run('legacy', legacy_gettoken, users,
+                         default_token_generator.make_token)
+                self.run('cached', gettoken, users, issue_code)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def create_users(self, number):
+        prefix = f'benchmark_{time.time_ns()}'
+        User.objects.bulk_create(
+            User(username=f'{prefix}_{idx}',
+                 email=f'{prefix}_{idx}@yamdb.fake')
+            for idx in range(number)
+        )
+        return list(User.objects.filter(username__startswith=prefix))
+
+    def run(self, name, view, users, make_code):
+        factory = APIRequestFactory()
+        requests = [
+            factory.post(URL, {
+                'username': user.username,
+                'confirmation_code': make_code(user),
+            }, format='json')
+            for user in users
+        ]
+        failed = 0
+        started = time.monotonic()
+        with CaptureQueriesContext(connection) as context:
+            for request in requests:
+                if view(request).status_code != status.HTTP_200_OK:
+                    failed += 1
+        elapsed = time.monotonic() - started
+        rate = len(requests) / elapsed if elapsed else len(requests)
+        queries = len(context.captured_queries) / len(requests)
+        self.stdout.write(
+            f'{name}: {rate:.0f} requests/s, {queries:.2f} queries/request, '
+            f'failed {failed}.'
+        )
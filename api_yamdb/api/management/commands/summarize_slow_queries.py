@@ -0,0 +1,91 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def read_records(path):
+    """Записи журнала и его ротированных копий, битые строки
+    пропускаются."""
+    paths = sorted(path.parent.glob(f'{path.name}.*'), reverse=True)
+    for log in paths + [path]:
+        with open(log, encoding='utf-8') as stream:
+            for line in stream:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def summarize(records):
+    """Группирует записи по тексту SQL: параметры в журнале отдельно,
+    поэтому запросы с разными значениями попадают в одну группу."""
+    groups = {}
+    for record in records:
+        group = groups.setdefault(record['sql'], {
+            'sql': record['sql'],
+            'count': 0,
+            'total_ms': 0.0,
+            'max_ms': 0.0,
+            'views': {},
+            'plan': record.get('plan'),
+        })
+        group['count'] += 1
+        group['total_ms'] += record['duration_ms']
+        group['max_ms'] = max(group['max_ms'], record['duration_ms'])
+        view = record.get('view') or '-'
+        group['views'][view] = group['views'].get(view, 0) + 1
+    for group in groups.values():
+        group['avg_ms'] = group['total_ms'] / group['count']
+        group['full_scan'] = any(
+            step.startswith('SCAN') for step in group['plan'] or ()
+        )
+    return sorted(groups.values(), key=lambda group: -group['total_ms'])
+
+
+class Command(BaseCommand):
+
+    help = 'Summarizes the slow query log by total time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--log',
+            default=settings.SLOW_QUERY_LOG,
+            type=Path,
+            help='Path to the slow query log.',
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=10,
+            help='Number of queries to show.',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Print the summary as JSON.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['log'].exists():
+            raise CommandError(f'{options["log"]} does not exist.')
+        top = summarize(read_records(options['log']))[:options['top']]
+        if options['json']:
+            self.stdout.write(json.dumps(top, ensure_ascii=False, indent=2))
+            return
+        for number, group in enumerate(top, 1):
+            views = ', '.join(
+                f'{view} ({count})' for view, count
+                in sorted(group['views'].items(), key=lambda item: -item[1])
+            )
+            self.stdout.write(
+                f'{number}. {group["count"]} queries, '
+                f'total {group["total_ms"]:.1f} ms, '
+                f'avg {group["avg_ms"]:.1f} ms, max {group["max_ms"]:.1f} ms'
+                + (', full scan' if group['full_scan'] else '')
+            )
+            self.stdout.write(f'   views: {views}')
+            self.stdout.write(f'   {group["sql"]}')
+            for step in group['plan'] or ():
+                self.stdout.write(f'     {step}')
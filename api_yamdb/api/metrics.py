@@ -0,0 +1,386 @@
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+OTHER_ROUTE = 'other'
+ARCHIVE_NAME = 'archive.json'
+LOCK_NAME = 'metrics.lock'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class RouteStats:
+    """Счетчики одного маршрута: число запросов, гистограмма времени
+    ответа и суммы запросов к базе и времени по частям запроса."""
+
+    __slots__ = ('count', 'buckets', 'total_time', 'db_time',
+                 'serializer_time', 'queries', 'max_queries')
+
+    def __init__(self, buckets_number):
+        self.count = 0
+        self.buckets = [0] * buckets_number
+        self.total_time = 0.0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.queries = 0
+        self.max_queries = 0
+
+    def as_dict(self, bounds):
+        return {
+            'count': self.count,
+            'buckets': dict(zip(bounds, self.buckets)),
+            'total_time': self.total_time,
+            'db_time': self.db_time,
+            'serializer_time': self.serializer_time,
+            'queries': self.queries,
+            'max_queries': self.max_queries,
+        }
+
+
+class RouteHistogram:
+    """Статистика запросов по маршрутам в памяти процесса.
+
+    Границы корзин в миллисекундах берутся из REQUEST_TIMING_BUCKETS,
+    последняя корзина - для всего, что дольше. Число маршрутов
+    ограничено REQUEST_TIMING_MAX_ROUTES: остальные учитываются вместе
+    под именем 'other', поэтому память не растет."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes = {}
+
+    @property
+    def bounds(self):
+        return tuple(settings.REQUEST_TIMING_BUCKETS) + ('+Inf',)
+
+    def observe(self, route, timing, total_time):
+        total_ms = total_time * 1000
+        bucket = next(
+            (index for index, bound
+             in enumerate(settings.REQUEST_TIMING_BUCKETS)
+             if total_ms <= bound),
+            len(settings.REQUEST_TIMING_BUCKETS)
+        )
+        with self._lock:
+            stats = self.routes.get(route)
+            if stats is None:
+                if len(self.routes) >= settings.REQUEST_TIMING_MAX_ROUTES:
+                    route = OTHER_ROUTE
+                stats = self.routes.setdefault(
+                    route, RouteStats(len(self.bounds))
+                )
+            stats.count += 1
+            stats.buckets[bucket] += 1
+            stats.total_time += total_time
+            stats.db_time += timing.db_time
+            stats.serializer_time += timing.serializer_time
+            stats.queries += timing.queries
+            stats.max_queries = max(stats.max_queries, timing.queries)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                route: stats.as_dict(self.bounds)
+                for route, stats in self.routes.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self.routes.clear()
+
+
+routes = RouteHistogram()
+
+
+class Registry:
+    """Значения метрик процесса для экспорта в формате Prometheus.
+
+    Каждый поток пишет в свой словарь, поэтому увеличение счетчика
+    не требует блокировки; при сборе словари потоков суммируются.
+
+    Если задан METRICS_MULTIPROCESS_DIR, процесс не реже раза
+    в METRICS_FLUSH_INTERVAL секунд сохраняет свои значения в файл
+    <pid>.json в этой директории, а collect_all складывает файлы всех
+    процессов: так любой воркер gunicorn отдает общие значения.
+
+    Значения завершившихся процессов прибавляются к archive.json,
+    а их файлы удаляются, поэтому счетчики не уменьшаются после
+    перезапуска воркеров и число файлов не растет. Процесс переносит
+    свои значения сам при выходе; файлы процессов, завершенных
+    без этого, переносит collect_all."""
+
+    def __init__(self):
+        self.metrics = {}
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+        self._flushed_at = 0.0
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def add(self, key, value):
+        shard = getattr(self._local, 'values', None)
+        if shard is None:
+            shard = self._local.values = {}
+            with self._lock:
+                self._shards.append(shard)
+        shard[key] = shard.get(key, 0) + value
+
+    def collect(self):
+        """Значения текущего процесса: {(имя, метки): значение}."""
+        with self._lock:
+            shards = list(self._shards)
+        totals = {}
+        for shard in shards:
+            for key, value in list(shard.items()):
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def collect_all(self):
+        totals = self.collect()
+        directory = settings.METRICS_MULTIPROCESS_DIR
+        if not directory:
+            return totals
+        self.archive_dead(directory)
+        own = self.get_path(directory)
+        with locked(directory, shared=True):
+            paths = [
+                path for path in Path(directory).glob('*.json')
+                if path != own
+            ]
+            for path in paths:
+                add_samples(totals, read_samples(path))
+        return totals
+
+    def archive_dead(self, directory):
+        for path in Path(directory).glob('*.json'):
+            if path.stem.isdigit() and not is_alive(int(path.stem)):
+                self.archive(directory, path)
+
+    def archive(self, directory, path, totals=None):
+        """Прибавляет к archive.json значения totals или, если они
+        не переданы, файла path, и удаляет path."""
+        archive_path = Path(directory) / ARCHIVE_NAME
+        with locked(directory):
+            if totals is None:
+                # Файл мог уже перенести другой процесс.
+                if not path.exists():
+                    return
+                totals = read_samples(path)
+            archived = read_samples(archive_path)
+            add_samples(archived, totals)
+            write_samples(archive_path, archived)
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def get_path(self, directory):
+        return Path(directory) / f'{os.getpid()}.json'
+
+    def flush(self):
+        directory = settings.METRICS_MULTIPROCESS_DIR
+        if not directory:
+            return
+        write_samples(self.get_path(directory), self.collect())
+        self._flushed_at = time.monotonic()
+
+    def maybe_flush(self):
+        if (settings.METRICS_MULTIPROCESS_DIR
+                and time.monotonic() - self._flushed_at
+                >= settings.METRICS_FLUSH_INTERVAL):
+            self.flush()
+
+    def shutdown(self):
+        """Переносит значения выходящего процесса в archive.json."""
+        directory = settings.METRICS_MULTIPROCESS_DIR
+        if directory:
+            self.archive(
+                directory, self.get_path(directory), self.collect()
+            )
+
+    def reset(self):
+        with self._lock:
+            for shard in self._shards:
+                shard.clear()
+
+
+def read_samples(path):
+    """Значения из файла процесса: {(имя, метки): значение}."""
+    try:
+        samples = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    return {
+        (name, tuple(map(tuple, labels))): value
+        for name, labels, value in samples
+    }
+
+
+def write_samples(path, totals):
+    temporary = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    temporary.write_text(json.dumps([
+        [name, labels, value] for (name, labels), value in totals.items()
+    ]))
+    # Читатели видят либо старый, либо новый файл целиком.
+    os.replace(temporary, path)
+
+
+def add_samples(totals, samples):
+    for key, value in samples.items():
+        totals[key] = totals.get(key, 0) + value
+
+
+def is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+@contextmanager
+def locked(directory, shared=False):
+    """Блокировка директории метрик: перенос в archive.json и чтение
+    файлов не пересекаются, поэтому значения не учитываются дважды.
+    Без fcntl (Windows) блокировки нет."""
+    if fcntl is None:
+        yield
+        return
+    with open(Path(directory) / LOCK_NAME, 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        yield
+
+
+registry = Registry()
+atexit.register(registry.shutdown)
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.samples = (name,)
+        registry.register(self)
+
+    def get_labels(self, labels):
+        return tuple((name, str(labels[name])) for name in self.labelnames)
+
+    def inc(self, value=1, **labels):
+        registry.add((self.name, self.get_labels(labels)), value)
+
+
+class Histogram(Counter):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self.samples = (f'{name}_bucket', f'{name}_sum', f'{name}_count')
+
+    def observe(self, value, **labels):
+        labels = self.get_labels(labels)
+        # Корзины хранятся накопленными, как их отдает Prometheus.
+        for bound in self.buckets:
+            if value <= bound:
+                registry.add(
+                    (f'{self.name}_bucket', labels + (('le', str(bound)),)), 1
+                )
+        registry.add((f'{self.name}_bucket', labels + (('le', '+Inf'),)), 1)
+        registry.add((f'{self.name}_sum', labels), value)
+        registry.add((f'{self.name}_count', labels), 1)
+
+
+def escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace(
+        '\n', '\\n'
+    )
+
+
+def sample_order(item):
+    (name, labels), _ = item
+    return (
+        name,
+        tuple(value for label, value in labels if label != 'le'),
+        float(dict(labels).get('le', 0)),
+    )
+
+
+def render():
+    """Метрики всех процессов в текстовом формате Prometheus."""
+    samples = {}
+    for item in sorted(registry.collect_all().items(), key=sample_order):
+        samples.setdefault(item[0][0], []).append(item)
+    lines = []
+    for metric in registry.metrics.values():
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.type}')
+        for sample in metric.samples:
+            for (name, labels), value in samples.get(sample, ()):
+                label_text = ','.join(
+                    f'{label}="{escape(label_value)}"'
+                    for label, label_value in labels
+                )
+                lines.append(f'{name}{{{label_text}}} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+REQUEST_DURATION_BUCKETS = tuple(
+    bound / 1000 for bound in settings.REQUEST_TIMING_BUCKETS
+)
+
+http_requests = Counter(
+    'yamdb_http_requests_total', 'HTTP requests by view action.',
+    ('action', 'method', 'status'),
+)
+http_request_duration = Histogram(
+    'yamdb_http_request_duration_seconds', 'Response time by view action.',
+    ('action',), REQUEST_DURATION_BUCKETS,
+)
+db_queries = Counter(
+    'yamdb_db_queries_total', 'Database queries by view action.',
+    ('action',),
+)
+db_query_duration = Counter(
+    'yamdb_db_query_duration_seconds_total',
+    'Time spent in database queries by view action.', ('action',),
+)
+cache_requests = Counter(
+    'yamdb_cache_requests_total', 'Cache lookups by cache and result.',
+    ('cache', 'result'),
+)
+throttled_requests = Counter(
+    'yamdb_throttled_requests_total', 'Requests rejected by throttles.',
+    ('scope',),
+)
+import_rows = Counter(
+    'yamdb_import_rows_total', 'Rows read by import_files.', ('model',),
+)
+import_duration = Counter(
+    'yamdb_import_duration_seconds_total', 'Time spent by import_files.',
+    ('model',),
+)
+export_rows = Counter(
+    'yamdb_export_rows_total', 'Rows written by export_data.', ('model',),
+)
+export_duration = Counter(
+    'yamdb_export_duration_seconds_total', 'Time spent by export_data.',
+    ('model',),
+)
@@ -0,0 +1,128 @@
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .metrics import (db_queries, db_query_duration, http_request_duration,
+                      http_requests, routes)
+from .slow_queries import current_timing
+
+UNRESOLVED_ROUTE = 'unresolved'
+
+
+class RequestTiming:
+    """Запросы к базе и время, потраченное на них и на сериализаторы,
+    в рамках одного HTTP-запроса.
+
+    serializer - имя класса сериализатора, который сейчас работает:
+    оно попадает в журнал медленных запросов."""
+
+    __slots__ = ('request', 'queries', 'db_time', 'serializer_time',
+                 'serializer')
+
+    def __init__(self, request):
+        self.request = request
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer = None
+
+    def execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    @property
+    def view(self):
+        return get_action(self.request)
+
+    def server_timing(self, total_time):
+        view_time = max(total_time - self.db_time - self.serializer_time, 0)
+        return ', '.join((
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries"',
+            f'serializer;dur={self.serializer_time * 1000:.2f}',
+            f'view;dur={view_time * 1000:.2f}',
+            f'total;dur={total_time * 1000:.2f}',
+        ))
+
+
+@contextmanager
+def serializer_timing(serializer):
+    """Учитывает время работы сериализатора в текущем запросе.
+    Вложенные сериализаторы не учитываются повторно."""
+    timing = current_timing.get()
+    if timing is None or timing.serializer is not None:
+        yield
+        return
+    timing.serializer = type(serializer).__name__
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.serializer_time += time.perf_counter() - started
+        timing.serializer = None
+
+
+class RequestTimingMiddleware:
+    """Считает запросы к базе и время ответа, отдает их в заголовке
+    Server-Timing и собирает статистику по маршрутам в metrics.routes.
+
+    При REQUEST_TIMING_ENABLED = False Django исключает middleware
+    из цепочки, и оно ничего не стоит."""
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing = RequestTiming(request)
+        token = current_timing.set(timing)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(timing.execute)
+                    )
+                response = self.get_response(request)
+        finally:
+            current_timing.reset(token)
+        total_time = time.perf_counter() - started
+        response['Server-Timing'] = timing.server_timing(total_time)
+        routes.observe(get_route(request), timing, total_time)
+        action = get_action(request)
+        http_requests.inc(
+            action=action, method=request.method,
+            status=response.status_code
+        )
+        http_request_duration.observe(total_time, action=action)
+        db_queries.inc(timing.queries, action=action)
+        db_query_duration.inc(timing.db_time, action=action)
+        return response
+
+
+def get_route(request):
+    """Имя маршрута, например 'api:titles-list'."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNRESOLVED_ROUTE
+    return match.view_name
+
+
+def get_action(request):
+    """Вьюсет и действие, например 'TitleViewSet.list', для остальных
+    представлений - имя функции."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNRESOLVED_ROUTE
+    actions = getattr(match.func, 'actions', None)
+    if actions:
+        action = actions.get(request.method.lower(), request.method.lower())
+        return f'{match.func.cls.__name__}.{action}'
+    return match.func.__name__
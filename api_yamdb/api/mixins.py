@@ -1,5 +1,9 @@
 from rest_framework import mixins, viewsets
 
+from .cache import cached_response
+from .conditional import conditional_response
+from .facets import get_facets, parse_facets
+
 
 class ListCreateDestroyViewSet(
     mixins.ListModelMixin,
@@ -8,3 +12,60 @@ class ListCreateDestroyViewSet(
     viewsets.GenericViewSet
 ):
     pass
+
+
+class CachedListMixin:
+    """Кэширует ответ на 'list' до изменения моделей из cache_models."""
+
+    cache_models = ()
+
+    def list(self, request, *args, **kwargs):
+        return cached_response(
+            request, self.cache_models, super().list, *args, **kwargs
+        )
+
+
+class CachedRetrieveMixin:
+    """Кэширует ответ на 'retrieve' до изменения моделей из cache_models."""
+
+    cache_models = ()
+
+    def retrieve(self, request, *args, **kwargs):
+        return cached_response(
+            request, self.cache_models, super().retrieve, *args, **kwargs
+        )
+
+
+class ConditionalGetMixin:
+    """Поддерживает условные GET-запросы для 'list' и 'retrieve'
+    по поколениям моделей из conditional_models."""
+
+    conditional_models = ()
+
+    def list(self, request, *args, **kwargs):
+        return conditional_response(
+            request, self.conditional_models, super().list, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return conditional_response(
+            request, self.conditional_models, super().retrieve,
+            *args, **kwargs
+        )
+
+
+class FacetListMixin:
+    """Добавляет к ответу на 'list' с параметром '?facets=genre,category,year'
+    количество объектов отфильтрованной выборки по значениям фасетов."""
+
+    facets_query_param = 'facets'
+
+    def list(self, request, *args, **kwargs):
+        value = request.query_params.get(self.facets_query_param)
+        names = parse_facets(value) if value else None
+        response = super().list(request, *args, **kwargs)
+        if names:
+            response.data[self.facets_query_param] = get_facets(
+                self.filter_queryset(self.get_queryset()), names
+            )
+        return response
@@ -0,0 +1,104 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from rest_framework.pagination import (BasePagination, CursorPagination,
+                                       PageNumberPagination)
+
+
+class CountedPaginator(Paginator):
+    """Пагинатор, получающий количество объектов из переданной функции
+    вместо COUNT(*) по всему queryset."""
+
+    def __init__(self, object_list, per_page, count_getter=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_getter = count_getter
+
+    @cached_property
+    def count(self):
+        if self.count_getter is None:
+            return super().count
+        return self.count_getter()
+
+
+class ApproximateCountPagination(PageNumberPagination):
+    """Пагинация по номеру страницы без точного COUNT(*) для больших
+    коллекций.
+
+    Количество берется из счетчика, который поддерживает вьюсет
+    (метод get_collection_count), иначе - точно, если объектов не больше
+    PAGINATION_EXACT_COUNT_LIMIT, иначе - из кэша, который обновляется
+    не реже раза в PAGINATION_COUNT_CACHE_TIMEOUT секунд."""
+
+    cache_key_prefix = 'pagination_count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.view = view
+        return super().paginate_queryset(queryset, request, view)
+
+    def django_paginator_class(self, queryset, page_size):
+        return CountedPaginator(
+            queryset, page_size,
+            count_getter=lambda: self.get_count(queryset)
+        )
+
+    def get_count(self, queryset):
+        get_collection_count = getattr(
+            self.view, 'get_collection_count', None
+        )
+        if get_collection_count is not None:
+            count = get_collection_count()
+            if count is not None:
+                return count
+
+        limit = settings.PAGINATION_EXACT_COUNT_LIMIT
+        count = len(queryset.values_list('pk', flat=True)[:limit + 1])
+        if count <= limit:
+            return count
+
+        key = '{}:{}'.format(
+            self.cache_key_prefix,
+            md5(str(queryset.query).encode()).hexdigest()
+        )
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+        return count
+
+
+class PubDateCursorPagination(CursorPagination):
+    """Курсорная пагинация по дате публикации: стоимость страницы
+    не зависит от ее номера."""
+
+    ordering = ('-pub_date', '-id')
+
+
+class PageNumberOrCursorPagination(BasePagination):
+    """Пагинация по номеру страницы, а при запросе с параметром
+    '?pagination=cursor' или '?cursor=' - курсорная."""
+
+    page_pagination_class = ApproximateCountPagination
+    cursor_pagination_class = PubDateCursorPagination
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+
+    def get_paginator(self, request):
+        cursor_query_param = self.cursor_pagination_class.cursor_query_param
+        if (request.query_params.get(self.mode_query_param)
+                == self.cursor_mode
+                or cursor_query_param in request.query_params):
+            return self.cursor_pagination_class()
+        return self.page_pagination_class()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.get_paginator(request)
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_results(self, data):
+        return self.paginator.get_results(data)
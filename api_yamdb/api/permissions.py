@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import permissions
 
 
@@ -30,5 +31,18 @@ class IsAdminIsModeratorIsAuthorOrReadOnly(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
         return (request.method in permissions.SAFE_METHODS
-                or (obj.author == request.user or request.user.is_admin
+                or (obj.author_id == request.user.id or request.user.is_admin
                     or request.user.is_moderator))
+
+
+class IsAdminOrLocalhost(permissions.BasePermission):
+    """Доступ администратору и клиентам из METRICS_ALLOWED_IPS.
+
+    Запрос с X-Forwarded-For пришел через прокси и локальным
+    не считается, даже если прокси работает на этом же сервере."""
+
+    def has_permission(self, request, view):
+        return (
+            request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+            and 'HTTP_X_FORWARDED_FOR' not in request.META
+        ) or (request.user.is_authenticated and request.user.is_admin)
@@ -0,0 +1,148 @@
+import cProfile
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from rest_framework.exceptions import APIException
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from .authentication import RoleJWTAuthentication
+from .middleware import get_action
+
+CPROFILE = 'cprofile'
+SAMPLING = 'sampling'
+MODES = (CPROFILE, SAMPLING)
+PROFILE_FILE_HEADER = 'X-Profile-File'
+
+
+class StackSampler:
+    """Сэмплирующий профилировщик: отдельный поток раз в interval
+    секунд снимает стек потока запроса и считает одинаковые стеки.
+
+    Результат - collapsed stacks ('кадр;кадр;кадр число') для
+    flamegraph.pl и speedscope."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        while True:
+            self.sample()
+            if self._stop.wait(self.interval):
+                break
+
+    def sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(
+                f'{Path(code.co_filename).name}:{code.co_name}:'
+                f'{code.co_firstlineno}'
+            )
+            frame = frame.f_back
+        if stack:
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as stream:
+            for stack, count in self.stacks.most_common():
+                stream.write(f'{stack} {count}\n')
+
+
+def is_admin(request):
+    """Администратор по сессии или JWT. Токен проверяется только
+    для запросов с заголовком профилирования."""
+    if getattr(request, 'user', None) is not None and (
+        request.user.is_authenticated and request.user.is_admin
+    ):
+        return True
+    try:
+        authenticated = RoleJWTAuthentication().authenticate(request)
+    except (APIException, InvalidToken, TokenError):
+        return False
+    return authenticated is not None and authenticated[0].is_admin
+
+
+def get_mode(request):
+    """Режим профилирования запроса или None, если профилировать
+    его не нужно."""
+    header = request.META.get('HTTP_X_PROFILE')
+    if header is not None and is_admin(request):
+        return header if header in MODES else settings.PROFILING_MODE
+    rate = settings.PROFILING_SAMPLE_RATE
+    if rate and random.random() < rate:
+        return settings.PROFILING_MODE
+    return None
+
+
+def get_profile_path(request, extension):
+    directory = Path(settings.PROFILING_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    route = re.sub(r'[^\w.-]', '_', get_action(request))
+    return directory / f'{route}.{time.time_ns()}.{extension}'
+
+
+class ProfilingMiddleware:
+    """Профилирует view для доли запросов PROFILING_SAMPLE_RATE
+    и запросов администратора с заголовком X-Profile.
+
+    В режиме 'cprofile' сохраняется файл .prof для pstats и snakeviz,
+    в режиме 'sampling' - .collapsed для flamegraph. Имя файла
+    начинается с действия вьюсета, например TitleViewSet.list, и
+    возвращается в заголовке X-Profile-File запросам с X-Profile."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = get_mode(request)
+        if mode is None:
+            return self.get_response(request)
+        if mode == SAMPLING:
+            response, path = self.sample(request)
+        else:
+            response, path = self.profile(request)
+        if 'HTTP_X_PROFILE' in request.META:
+            response[PROFILE_FILE_HEADER] = path.name
+        return response
+
+    def profile(self, request):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        path = get_profile_path(request, 'prof')
+        profiler.dump_stats(path)
+        return response, path
+
+    def sample(self, request):
+        sampler = StackSampler(
+            threading.get_ident(), settings.PROFILING_SAMPLING_INTERVAL
+        )
+        sampler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop()
+        path = get_profile_path(request, 'collapsed')
+        sampler.dump(path)
+        return response, path
@@ -4,28 +4,94 @@ from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 
 from reviews.models import Category, Comment, Genre, Title, Review
+from users.cache import user_cache
 from users.models import User
 
+from .middleware import serializer_timing
 
-class CategorySerializer(serializers.ModelSerializer):
+
+class TimedSerializerMixin:
+    """Учитывает время валидации и сериализации в заголовке
+    Server-Timing, если подключен RequestTimingMiddleware."""
+
+    def is_valid(self, *args, **kwargs):
+        with serializer_timing(self):
+            return super().is_valid(*args, **kwargs)
+
+    @property
+    def data(self):
+        with serializer_timing(self):
+            return super().data
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+
+class AuthorField(serializers.Field):
+    """Username автора по author_id из кэша пользователей процесса
+    вместо JOIN с таблицей пользователей."""
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = 'author_id'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        info = user_cache.get(value)
+        return info.username if info else None
+
+
+def collect_author_ids(serializer, objects):
+    """Id авторов объектов и вложенных в них списков, которые выводятся
+    через AuthorListSerializer, например, последних комментариев."""
+    author_ids = {obj.author_id for obj in objects}
+    for field in serializer.fields.values():
+        if not isinstance(field, AuthorListSerializer):
+            continue
+        for obj in objects:
+            nested = getattr(obj, field.source, None)
+            if nested is None:
+                continue
+            author_ids |= collect_author_ids(
+                field.child, list(
+                    nested.all() if hasattr(nested, 'all') else nested
+                )
+            )
+    return author_ids
+
+
+class AuthorListSerializer(TimedListSerializer):
+    """Загружает в кэш авторов всей страницы, включая авторов вложенных
+    списков, одним запросом."""
+
+    def to_representation(self, data):
+        data = list(data.all() if hasattr(data, 'all') else data)
+        user_cache.get_many(collect_author_ids(self.child, data))
+        return super().to_representation(data)
+
+
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериалайзер для модели Category."""
 
     class Meta:
         model = Category
+        list_serializer_class = TimedListSerializer
         exclude = ('id',)
         lookup_field = 'slug'
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериалайзер для модели Genre."""
 
     class Meta:
         model = Genre
+        list_serializer_class = TimedListSerializer
         fields = ('name', 'slug')
         lookup_field = 'slug'
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class TitleSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериалайзер для модели Title."""
 
     genre = serializers.SlugRelatedField(
@@ -51,7 +117,8 @@ class TitleSerializer(serializers.ModelSerializer):
         return data
 
 
-class ReadOnlyTitleSerializer(serializers.ModelSerializer):
+class ReadOnlyTitleSerializer(TimedSerializerMixin,
+                              serializers.ModelSerializer):
     """Сериалайзер для модели Title при действии 'retrieve', 'list.'"""
 
     genre = GenreSerializer(many=True)
@@ -60,36 +127,49 @@ class ReadOnlyTitleSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Title
+        list_serializer_class = TimedListSerializer
         fields = ('id', 'name', 'year', 'rating', 'description', 'genre',
                   'category')
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериалайзер для модели Review."""
 
-    author = serializers.SlugRelatedField(slug_field='username',
-                                          read_only=True)
+    author = AuthorField()
     title = serializers.StringRelatedField()
 
     class Meta:
         model = Review
+        list_serializer_class = AuthorListSerializer
         fields = ('id', 'title', 'author', 'text', 'score',
-                  'comments', 'pub_date')
+                  'comments_count', 'pub_date')
+        read_only_fields = ('comments_count',)
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериалайзер для модели Comment."""
 
-    author = serializers.SlugRelatedField(slug_field='username',
-                                          read_only=True)
+    author = AuthorField()
     review = serializers.StringRelatedField()
 
     class Meta:
         model = Comment
+        list_serializer_class = AuthorListSerializer
         fields = ('text', 'author', 'id', 'review', 'pub_date')
 
 
-class UserSerializer(serializers.ModelSerializer):
+class ReviewExpandedSerializer(ReviewSerializer):
+    """Сериалайзер для модели Review с последними комментариями
+    при запросе с параметром '?expand=comments'."""
+
+    comments = CommentSerializer(many=True, read_only=True,
+                                 source='latest_comments')
+
+    class Meta(ReviewSerializer.Meta):
+        fields = ReviewSerializer.Meta.fields + ('comments',)
+
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериалайзер пользователя - Администратор"""
     username = serializers.CharField(
         validators=(
@@ -108,25 +188,26 @@ class UserSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = User
+        list_serializer_class = TimedListSerializer
         fields = (
             'username', 'email', 'first_name',
             'last_name', 'bio', 'role'
         )
 
 
-class UserRegistrering(serializers.ModelSerializer):
+class UserRegistrering(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для регистрации пользователей."""
+    # Уникальность проверяет signup одним запросом для обоих полей
+    # и передает занятые значения в context вместо UniqueValidator.
     username = serializers.CharField(
         validators=(
-            UniqueValidator(queryset=User.objects.all()),
             RegexValidator(regex=r'^[\w.@+-]+\Z',
-                           message='Неверное имя пользователя')
+                           message='Неверное имя пользователя'),
         ),
         required=True,
         max_length=150
     )
     email = serializers.EmailField(
-        validators=(UniqueValidator(queryset=User.objects.all()),),
         required=True,
         max_length=254
     )
@@ -140,16 +221,27 @@ class UserRegistrering(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 'Использовать имя me в качестве username запрещено'
             )
+        if value in self.context.get('taken_usernames', ()):
+            raise serializers.ValidationError(
+                'Пользователь с таким username уже существует'
+            )
+        return value
+
+    def validate_email(self, value):
+        if value in self.context.get('taken_emails', ()):
+            raise serializers.ValidationError(
+                'Пользователь с таким email уже существует'
+            )
         return value
 
 
-class TokenJWTSerializer(serializers.Serializer):
+class TokenJWTSerializer(TimedSerializerMixin, serializers.Serializer):
     """"Сериалайзер для получения токена"""
     username = serializers.CharField(required=True)
     confirmation_code = serializers.CharField(required=True)
 
 
-class UserMeSerializer(serializers.ModelSerializer):
+class UserMeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для работы с личными данными поьзователя."""
     username = serializers.CharField(
         validators=(
@@ -0,0 +1,58 @@
+import math
+
+from django.core.signals import request_finished
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+from .authentication import user_changed
+from .cache import bump_generation
+from .metrics import registry
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def catalog_changed(sender, **kwargs):
+    bump_generation(sender)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_generation(Title)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    if not created:
+        # Время изменения пишется в базу, чтобы о нем узнали
+        # и процессы, в кэше которых его нет.
+        instance.changed_at = timezone.now()
+        User.objects.filter(pk=instance.pk).update(
+            changed_at=instance.changed_at
+        )
+        user_changed(instance.pk, instance.changed_at.timestamp())
+        # Имя пользователя выводится в отзывах и комментариях.
+        bump_generation(User)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    user_changed(instance.pk, math.inf)
+    bump_generation(User)
+
+
+@receiver(request_finished)
+def flush_metrics(sender, **kwargs):
+    registry.maybe_flush()
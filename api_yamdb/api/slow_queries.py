@@ -0,0 +1,91 @@
+import json
+import logging
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils import timezone
+
+logger = logging.getLogger('api.slow_queries')
+
+# RequestTiming текущего HTTP-запроса, если подключен
+# RequestTimingMiddleware: из него в журнал попадают действие
+# вьюсета и сериализатор.
+current_timing = ContextVar('current_timing', default=None)
+
+EXPLAIN_PREFIX = 'EXPLAIN QUERY PLAN '
+
+
+def explain(connection, sql, params):
+    """План запроса SQLite. Выполняется в отдельном курсоре без оберток
+    Django, поэтому не попадает в статистику и не сбивает результат
+    исходного запроса."""
+    if connection.vendor != 'sqlite' or not sql.lstrip().upper().startswith(
+        ('SELECT', 'WITH')
+    ):
+        return None
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(EXPLAIN_PREFIX + sql, params or ())
+        return [row[-1] for row in cursor.fetchall()]
+    except Exception as error:
+        return [f'EXPLAIN failed: {error}']
+    finally:
+        cursor.close()
+
+
+def log_slow_query(connection, sql, params, many, duration, view, serializer):
+    """Пишет запрос дольше SLOW_QUERY_THRESHOLD_MS миллисекунд одной
+    JSON-строкой в лог api.slow_queries.
+
+    Параметры запроса могут содержать адреса почты и коды
+    подтверждения, поэтому пишутся только при SLOW_QUERY_LOG_PARAMS."""
+    logger.info(json.dumps({
+        'time': timezone.now().isoformat(),
+        'duration_ms': round(duration * 1000, 3),
+        'sql': sql,
+        'params': (
+            params if settings.SLOW_QUERY_LOG_PARAMS and not many else None
+        ),
+        'view': view,
+        'serializer': serializer,
+        'plan': None if many else explain(connection, sql, params),
+    }, ensure_ascii=False, default=str))
+
+
+def is_slow(duration):
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    return threshold is not None and duration * 1000 >= threshold
+
+
+def log_slow_queries(execute, sql, params, many, context):
+    """Обертка execute_wrapper, которая пишет медленные запросы
+    в журнал."""
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        if is_slow(duration):
+            timing = current_timing.get()
+            log_slow_query(
+                context['connection'], sql, params, many, duration,
+                timing.view if timing else None,
+                timing.serializer if timing else None,
+            )
+
+
+@receiver(connection_created)
+def install_slow_query_log(sender, connection, **kwargs):
+    """Подключает журнал к каждому соединению с базой, поэтому он
+    работает и в командах manage.py, и без RequestTimingMiddleware.
+    Соединение открывается заново на том же объекте, поэтому обертка
+    не добавляется повторно.
+
+    Соединение может открыться внутри connection.execute_wrapper,
+    который при выходе снимает последнюю обертку из списка, поэтому
+    журнал ставится в начало."""
+    if log_slow_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, log_slow_queries)
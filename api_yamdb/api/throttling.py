@@ -0,0 +1,130 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.throttling import BaseThrottle
+
+from .metrics import throttled_requests
+
+THROTTLE_KEY = 'throttle:{}:{}:{}'
+ANON_ROLE = 'anon'
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+
+def parse_rate(rate):
+    """'30/hour' -> (30, 3600)."""
+    number, period = rate.split('/')
+    return int(number), PERIODS[period[0]]
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """Ограничение частоты запросов скользящим окном.
+
+    Для клиента хранятся только два счетчика: текущего и предыдущего
+    окна. Число запросов за последние duration секунд оценивается как
+    счетчик текущего окна плюс часть предыдущего, пропорциональная
+    тому, насколько окна перекрываются. Проверка - одно чтение двух
+    ключей и одна запись в кэш.
+
+    Лимиты задаются в THROTTLE_RATES[scope] по ролям, для анонимных
+    клиентов - по ключу 'anon'. Администраторы не ограничиваются,
+    роли без лимита тоже. Если by_ip включен, все клиенты, в том числе
+    аутентифицированные, считаются по IP-адресу с лимитом 'anon'."""
+
+    scope = None
+    by_ip = False
+    # Для вьюсетов ограничиваются только эти действия.
+    actions = None
+
+    def get_role(self, request):
+        if self.by_ip or not request.user.is_authenticated:
+            return ANON_ROLE
+        if request.user.is_admin:
+            return None
+        return request.user.role
+
+    def get_ident(self, request):
+        """Адрес клиента без учета X-Forwarded-For: без NUM_PROXIES
+        DRF берет его из заголовка, и клиент обходит лимит, подставляя
+        в заголовок новый адрес в каждом запросе."""
+        return request.META.get('REMOTE_ADDR')
+
+    def get_client_ident(self, request):
+        if request.user.is_authenticated and not self.by_ip:
+            return f'user:{request.user.id}'
+        return f'ip:{self.get_ident(request)}'
+
+    def get_rate(self, role):
+        try:
+            rate = settings.THROTTLE_RATES[self.scope].get(role)
+        except KeyError:
+            raise ImproperlyConfigured(
+                f'No THROTTLE_RATES for scope "{self.scope}".'
+            )
+        return parse_rate(rate) if rate else None
+
+    def allow_request(self, request, view):
+        if self.actions is not None and (
+            getattr(view, 'action', None) not in self.actions
+        ):
+            return True
+        role = self.get_role(request)
+        if role is None:
+            return True
+        rate = self.get_rate(role)
+        if rate is None:
+            return True
+        self.number, self.duration = rate
+
+        now = time.time()
+        window = int(now // self.duration)
+        ident = self.get_client_ident(request)
+        current_key = THROTTLE_KEY.format(self.scope, ident, window)
+        previous_key = THROTTLE_KEY.format(self.scope, ident, window - 1)
+        counts = cache.get_many((previous_key, current_key))
+        self.previous = counts.get(previous_key, 0)
+        self.current = counts.get(current_key, 0)
+        self.elapsed = now / self.duration - window
+        if self.estimate() >= self.number:
+            throttled_requests.inc(scope=self.scope)
+            return False
+        # Счетчик живет два окна: в следующем он станет предыдущим.
+        if not cache.add(current_key, 1, 2 * self.duration):
+            cache.incr(current_key)
+        return True
+
+    def estimate(self):
+        return self.previous * (1 - self.elapsed) + self.current
+
+    def wait(self):
+        """Секунды до того, как оценка опустится ниже лимита."""
+        if self.current >= self.number:
+            # В следующем окне текущий счетчик станет предыдущим.
+            return (1 - self.elapsed + max(
+                1 - self.number / self.current, 0
+            )) * self.duration
+        needed = 1 - (self.number - self.current) / self.previous
+        return max(needed - self.elapsed, 0) * self.duration
+
+
+# Подбор кода не должен обходиться отправкой любого токена
+# в заголовке, поэтому регистрация и получение токена считаются по IP.
+class SignupThrottle(SlidingWindowThrottle):
+    scope = 'signup'
+    by_ip = True
+
+
+class TokenThrottle(SlidingWindowThrottle):
+    scope = 'token'
+    by_ip = True
+
+
+class ReviewCreateThrottle(SlidingWindowThrottle):
+    scope = 'review'
+    actions = ('create',)
+
+
+class CommentCreateThrottle(SlidingWindowThrottle):
+    scope = 'comment'
+    actions = ('create',)
@@ -2,7 +2,8 @@ from django.urls import include, path
 from rest_framework import routers
 
 from .views import (CategoryViewSet, CommentViewSet, GenreViewSet, gettoken,
-                    ReviewViewSet, signup, TitleViewSet, UserViewSet)
+                    metrics, ReviewSearchViewSet, ReviewViewSet, signup,
+                    TitleViewSet, UserViewSet)
 
 app_name = 'api'
 
@@ -11,6 +12,8 @@ router = routers.DefaultRouter()
 router.register('categories', CategoryViewSet, basename='categories')
 router.register('genres', GenreViewSet, basename='genres')
 router.register('titles', TitleViewSet, basename='titles')
+router.register('reviews/search', ReviewSearchViewSet,
+                basename='review-search')
 router.register(r'titles/(?P<title_id>\d+)/reviews', ReviewViewSet,
                 basename='reviews')
 router.register(
@@ -22,4 +25,5 @@ urlpatterns = [
     path('v1/', include(router.urls)),
     path('v1/auth/signup/', signup),
     path('v1/auth/token/', gettoken),
+    path('metrics', metrics),
 ]
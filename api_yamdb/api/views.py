@@ -1,36 +1,53 @@
-from django.db.models import Avg
+from django.db import IntegrityError
+from django.db.models import Q, Subquery
+from django.http import HttpResponse
 
-from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
 
-from rest_framework import filters, viewsets, status, serializers
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework import filters, mixins, viewsets, status, serializers
+from rest_framework.decorators import (action, api_view, permission_classes,
+                                       throttle_classes)
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
 
-from reviews.models import Category, Genre, Review, Title
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.search import build_query
 from users.models import User
+from users.outbox import enqueue_email
 
+from .authentication import get_access_token, get_db_user
+from .confirmation import (consume_code, get_claims, get_token_user,
+                           issue_code)
 from .filters import FilterForTitles
 
-from .mixins import ListCreateDestroyViewSet
+from .metrics import CONTENT_TYPE, render
+from .mixins import (CachedListMixin, CachedRetrieveMixin,
+                     ConditionalGetMixin, FacetListMixin,
+                     ListCreateDestroyViewSet)
+
+from .pagination import PageNumberOrCursorPagination
 
 from .serializers import (CategorySerializer, GenreSerializer,
                           ReadOnlyTitleSerializer, TitleSerializer,
-                          ReviewSerializer, CommentSerializer, UserSerializer,
+                          ReviewSerializer, ReviewExpandedSerializer,
+                          CommentSerializer, UserSerializer,
                           UserMeSerializer, UserRegistrering,
                           TokenJWTSerializer)
-from .permissions import (IsAdminUser, RoleAdminrOrReadOnly,
+from .permissions import (IsAdminUser, IsAdminOrLocalhost,
+                          RoleAdminrOrReadOnly,
                           IsAdminIsModeratorIsAuthorOrReadOnly)
+from .throttling import (CommentCreateThrottle, ReviewCreateThrottle,
+                         SignupThrottle, TokenThrottle)
+
+EXPANDED_COMMENTS_LIMIT = 3
 
 
-class CategoryViewSet(ListCreateDestroyViewSet):
+class CategoryViewSet(CachedListMixin, ListCreateDestroyViewSet):
     """API для работы с категориями."""
 
     queryset = Category.objects.all()
+    cache_models = (Category,)
     serializer_class = CategorySerializer
     permission_classes = (RoleAdminrOrReadOnly,)
     filter_backends = (filters.SearchFilter,)
@@ -38,10 +55,11 @@ class CategoryViewSet(ListCreateDestroyViewSet):
     lookup_field = 'slug'
 
 
-class GenreViewSet(ListCreateDestroyViewSet):
+class GenreViewSet(CachedListMixin, ListCreateDestroyViewSet):
     """API для работы с жанрами."""
 
     queryset = Genre.objects.all()
+    cache_models = (Genre,)
     serializer_class = GenreSerializer
     permission_classes = (RoleAdminrOrReadOnly,)
     filter_backends = (filters.SearchFilter,)
@@ -49,55 +67,142 @@ class GenreViewSet(ListCreateDestroyViewSet):
     lookup_field = 'slug'
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(CachedListMixin, CachedRetrieveMixin, ConditionalGetMixin,
+                   FacetListMixin, viewsets.ModelViewSet):
     """API для работы c произведениями."""
 
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')
-    ).all().order_by('name')
+    queryset = Title.objects.all().order_by('name')
+    cache_models = (Title, Category, Genre, Review)
+    conditional_models = cache_models
     permission_classes = (RoleAdminrOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = FilterForTitles
     http_method_names = ['get', 'post', 'delete', 'patch']
 
+    def get_queryset(self):
+        if self.action in ('retrieve', 'list'):
+            return self.queryset.select_related(
+                'category'
+            ).prefetch_related('genre')
+        return self.queryset
+
     def get_serializer_class(self):
         if self.action in ('retrieve', 'list'):
             return ReadOnlyTitleSerializer
         return TitleSerializer
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+def attach_latest_comments(reviews):
+    """Загружает одним запросом по EXPANDED_COMMENTS_LIMIT последних
+    комментариев каждого отзыва в его атрибут latest_comments.
+
+    Для каждого отзыва строится свой подзапрос с LIMIT по индексу
+    (review, pub_date, id), поэтому отзыв стоит не больше
+    EXPANDED_COMMENTS_LIMIT строк, сколько бы комментариев у него ни было."""
+    reviews = {review.pk: review for review in reviews}
+    if not reviews:
+        return
+    latest = Q()
+    for review_id in reviews:
+        latest |= Q(pk__in=Subquery(
+            Comment.objects.filter(review_id=review_id).order_by(
+                '-pub_date', '-pk'
+            ).values('pk')[:EXPANDED_COMMENTS_LIMIT]
+        ))
+    for review in reviews.values():
+        review.latest_comments = []
+    for comment in Comment.objects.filter(latest).order_by(
+        '-pub_date', '-pk'
+    ):
+        review = reviews[comment.review_id]
+        comment.review = review
+        review.latest_comments.append(comment)
+
+
+class ReviewViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """API для работы c отзывами."""
 
     serializer_class = ReviewSerializer
+    conditional_models = (Review, Title, Comment, User)
     permission_classes = (IsAdminIsModeratorIsAuthorOrReadOnly,)
+    throttle_classes = (ReviewCreateThrottle,)
+    pagination_class = PageNumberOrCursorPagination
 
     def get_title(self):
-        title_id = self.kwargs.get('title_id')
-        return get_object_or_404(Title, pk=title_id)
+        if not hasattr(self, '_title'):
+            title_id = self.kwargs.get('title_id')
+            self._title = get_object_or_404(Title, pk=title_id)
+        return self._title
+
+    def get_collection_count(self):
+        return self.get_title().rating_count
+
+    def expand_comments(self):
+        expand = self.request.query_params.get('expand', '')
+        return 'comments' in expand.split(',')
+
+    def get_serializer_class(self):
+        if self.expand_comments():
+            return ReviewExpandedSerializer
+        return ReviewSerializer
 
     def get_queryset(self):
-        title = self.get_title()
-        return title.reviews.all()
+        return self.get_title().reviews.all()
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None and self.expand_comments():
+            attach_latest_comments(page)
+        return page
+
+    def get_object(self):
+        review = super().get_object()
+        if self.expand_comments():
+            attach_latest_comments([review])
+        return review
 
     def perform_create(self, serializer):
         title = self.get_title()
-        if title.reviews.filter(author=self.request.user).exists():
+        if title.reviews.filter(author_id=self.request.user.id).exists():
             raise serializers.ValidationError(
                 {'detail': 'Вы можете оставить только один отзыв.'})
-        serializer.save(author=self.request.user, title=title)
+        serializer.save(author=get_db_user(self.request.user), title=title)
         return title
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class ReviewSearchViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Полнотекстовый поиск по отзывам, лучшие совпадения первыми."""
+
+    serializer_class = ReviewSerializer
+
+    def get_queryset(self):
+        query = build_query(self.request.query_params.get('search', ''))
+        if query is None:
+            raise serializers.ValidationError(
+                {'search': 'Укажите текст для поиска.'}
+            )
+        return Review.objects.filter(
+            search_index__document__match=query
+        ).select_related('title').order_by('search_index__rank', 'id')
+
+
+class CommentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """API для работы c комментариями."""
 
     serializer_class = CommentSerializer
+    conditional_models = (Comment, Review, User)
     permission_classes = (IsAdminIsModeratorIsAuthorOrReadOnly,)
+    throttle_classes = (CommentCreateThrottle,)
+    pagination_class = PageNumberOrCursorPagination
 
     def get_review(self):
-        review_id = self.kwargs.get('review_id')
-        return get_object_or_404(Review, pk=review_id)
+        if not hasattr(self, '_review'):
+            review_id = self.kwargs.get('review_id')
+            self._review = get_object_or_404(Review, pk=review_id)
+        return self._review
+
+    def get_collection_count(self):
+        return self.get_review().comments_count
 
     def get_queryset(self):
         review = self.get_review()
@@ -105,7 +210,8 @@ class CommentViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         review = self.get_review()
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author=get_db_user(self.request.user),
+                        review=review)
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -130,7 +236,7 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer_class=UserMeSerializer,
     )
     def profile(self, request):
-        user = request.user
+        user = get_object_or_404(User, pk=request.user.id)
         if request.method == "GET":
             serializer = self.get_serializer(user)
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -148,52 +254,69 @@ class UserViewSet(viewsets.ModelViewSet):
 
 @api_view(['POST'])
 @permission_classes([AllowAny, ])
+@throttle_classes([SignupThrottle])
 def signup(request):
     """Регистрация пользователей"""
 
-    serializer = UserRegistrering(data=request.data)
-    if User.objects.filter(
-        username=request.data.get('username'),
-        email=request.data.get('email')
-    ).exists():
+    username = request.data.get('username')
+    email = request.data.get('email')
+    # Один запрос находит и уже зарегистрированную пару, и пользователей,
+    # занявших username или email: таких строк не больше двух.
+    conflicts = list(User.objects.filter(
+        Q(username=username) | Q(email=email)
+    ).order_by().values_list('username', 'email')[:2])
+    if (username, email) in conflicts:
         return Response(request.data, status=status.HTTP_200_OK)
-    if serializer.is_valid():
-        serializer.save()
-        user = get_object_or_404(
-            User, username=serializer.validated_data["username"]
-        )
-        confirmation_code = default_token_generator.make_token(user)
-        send_mail(
-            subject='Код подтверждения',
-            message=f'Код подтверждения для получения '
-                    f'токена {confirmation_code}',
-            from_email=None,
-            recipient_list=[user.email],
+    serializer = UserRegistrering(data=request.data, context={
+        'taken_usernames': {row[0] for row in conflicts},
+        'taken_emails': {row[1] for row in conflicts},
+    })
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        user = serializer.save()
+    except IntegrityError:
+        # Параллельный запрос успел занять username или email.
+        return Response(
+            {'detail': 'Пользователь с таким username или email '
+                       'уже существует'},
+            status=status.HTTP_400_BAD_REQUEST
         )
-        return Response(serializer.data, status=status.HTTP_200_OK)
-
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    confirmation_code = issue_code(user)
+    enqueue_email(
+        subject='Код подтверждения',
+        message=f'Код подтверждения для получения '
+                f'токена {confirmation_code}',
+        recipient=user.email,
+    )
+    return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([TokenThrottle])
 def gettoken(request):
     """Получение токена"""
 
     serializer = TokenJWTSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
     data = serializer.validated_data
-    try:
-        user = User.objects.get(username=data['username'])
-    except User.DoesNotExist:
+    claims = get_claims(data['username'])
+    if claims is None:
         return Response(
             {'username': 'Пользователь не найден!'},
             status=status.HTTP_404_NOT_FOUND)
-    if default_token_generator.check_token(
-        user, serializer.validated_data["confirmation_code"]
-    ):
-        token = AccessToken.for_user(user)
+    if consume_code(claims, data['confirmation_code']):
+        token = get_access_token(get_token_user(claims))
         return Response({'token': str(token)}, status=status.HTTP_200_OK)
 
     return Response({'confirmation_code': 'Неверный код подтверждения!'},
                     status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminOrLocalhost])
+def metrics(request):
+    """Метрики в формате Prometheus."""
+
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
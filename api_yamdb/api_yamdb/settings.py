@@ -29,9 +29,11 @@ INSTALLED_APPS = [
     'api.apps.ApiConfig',
     'reviews.apps.ReviewsConfig',
     'users.apps.UsersConfig',
+    'benchmarks.apps.BenchmarksConfig',
 ]
 
 MIDDLEWARE = [
+    'api.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -39,6 +41,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'api_yamdb.urls'
@@ -69,10 +72,34 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Parallel import_files workers wait for the SQLite write lock.
+        'OPTIONS': {'timeout': 20},
+        # import_files workers are separate processes and cannot see
+        # an in-memory test database.
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
 
+# Cache
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        # Confirmation codes live in the cache: the default 300 entries
+        # would evict them under a signup burst.
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+# How long (seconds) catalog responses are cached if nothing changes.
+RESPONSE_CACHE_TIMEOUT = 300
+# How long (seconds) other requests wait for a response being built.
+RESPONSE_CACHE_LOCK_TIMEOUT = 10
+# How long (seconds) genre and category slug -> id maps are cached.
+SLUG_MAP_CACHE_TIMEOUT = 60 * 60
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -119,15 +146,89 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.RoleJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.ApproximateCountPagination',
     'PAGE_SIZE': 7,
 }
 
+# Requests allowed per client in a sliding window: scope -> role -> rate.
+# 'anon' is used for unauthenticated clients; admins and roles without
+# a rate are not throttled. Signup and token requests are counted per IP
+# with the 'anon' rate whoever sends them.
+THROTTLE_RATES = {
+    'signup': {'anon': '30/hour'},
+    'token': {'anon': '60/hour'},
+    'review': {'user': '60/hour', 'moderator': '240/hour'},
+    'comment': {'user': '120/hour', 'moderator': '480/hour'},
+}
+
+# Query count and timings per request in the Server-Timing header and
+# per-route statistics; when disabled the middleware is not loaded.
+REQUEST_TIMING_ENABLED = True
+# Upper bounds (milliseconds) of response time histogram buckets.
+REQUEST_TIMING_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+# Routes beyond this number are counted together as 'other'.
+REQUEST_TIMING_MAX_ROUTES = 200
+
+# Queries slower than this (milliseconds) are logged with their plan
+# to SLOW_QUERY_LOG, in requests and management commands alike;
+# None disables the log.
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_LOG = BASE_DIR / 'slow_queries.log'
+# Query parameters may contain emails and confirmation codes.
+SLOW_QUERY_LOG_PARAMS = False
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'formatter': 'message',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'api.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# Fraction of requests profiled; admins can also send an X-Profile
+# header ('cprofile' or 'sampling') to profile a single request.
+PROFILING_SAMPLE_RATE = 0
+# 'cprofile' saves .prof files, 'sampling' saves collapsed stacks.
+PROFILING_MODE = 'cprofile'
+# How often (seconds) the sampling profiler records the stack.
+PROFILING_SAMPLING_INTERVAL = 0.005
+PROFILING_DIR = BASE_DIR / 'profiles'
+
+# Directory shared by all worker processes for /api/metrics; unset
+# means every process reports only its own metrics.
+METRICS_MULTIPROCESS_DIR = os.environ.get('METRICS_MULTIPROCESS_DIR')
+# How often (seconds) a process writes its metrics to that directory.
+METRICS_FLUSH_INTERVAL = 5
+# Clients allowed to read /api/metrics without an admin token.
+METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
+
+# Up to this many objects paginated lists are counted exactly.
+PAGINATION_EXACT_COUNT_LIMIT = 1000
+# How long (seconds) the count of a larger list may be served from cache.
+PAGINATION_COUNT_CACHE_TIMEOUT = 60
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
@@ -137,4 +238,26 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
 }
 
+# How long (seconds) a user row fetched by authentication is cached.
+AUTH_USER_CACHE_TIMEOUT = 60
+# How long (seconds) a confirmation code sent on signup stays valid.
+CONFIRMATION_CODE_TIMEOUT = 60 * 60 * 24
+# How many (username, role) pairs each process keeps in its user cache.
+USER_CACHE_SIZE = 10000
+# How long (seconds) a process keeps a user in that cache. Changes made in
+# another process are seen immediately only with a shared CACHES backend,
+# otherwise after at most this long.
+USER_CACHE_TIMEOUT = 60
+
 EMAIL_FROM = 'yam@localhost'
+
+# Emails are queued by the API and sent by the send_emails command.
+EMAIL_OUTBOX_BATCH_SIZE = 100
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+# Delay (seconds) before the first retry; doubled for every next one.
+EMAIL_OUTBOX_RETRY_DELAY = 30
+# How long (seconds) a sender keeps claimed emails before others may
+# take them over.
+EMAIL_OUTBOX_LOCK_TIMEOUT = 300
+# Sent and finally failed emails are deleted after this many seconds.
+EMAIL_OUTBOX_RETENTION = 7 * 24 * 60 * 60
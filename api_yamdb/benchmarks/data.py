@@ -0,0 +1,245 @@
+import itertools
+import random
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from api.cache import bump_generation
+from reviews.management.commands.recalculate_counters import (
+    recalculate_counters
+)
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+WORDS = (
+    'время', 'город', 'дорога', 'жизнь', 'звезда', 'зима', 'игра', 'история',
+    'капитан', 'клятва', 'король', 'лето', 'любовь', 'мастер', 'море',
+    'мост', 'ночь', 'огонь', 'остров', 'отец', 'память', 'песня', 'побег',
+    'поезд', 'река', 'сад', 'свет', 'сердце', 'сон', 'стена', 'тайна',
+    'тень', 'улица', 'утро', 'ветер', 'война', 'враг', 'голос', 'дом',
+    'друг', 'зеркало', 'книга', 'лес', 'мечта', 'небо', 'окно', 'путь',
+    'сила', 'снег', 'судьба',
+)
+# Оценки смещены к 7-9, как в настоящих отзывах.
+SCORE_WEIGHTS = (1, 1, 1, 2, 3, 5, 8, 10, 8, 6)
+SCORES = range(1, len(SCORE_WEIGHTS) + 1)
+FIRST_YEAR = 1920
+MAX_GENRES_PER_TITLE = 3
+PREFIX = 'bench'
+
+
+class ZipfSampler:
+    """Случайные номера от 1 до n: номер rank выпадает с вероятностью,
+    примерно пропорциональной 1 / rank ** s.
+
+    Номер получается обращением функции распределения непрерывного
+    степенного закона, поэтому таблица весов не нужна и выборка
+    годится для миллионов номеров."""
+
+    def __init__(self, n, s, rng):
+        self.n = n
+        self.s = s
+        self.rng = rng
+
+    def __call__(self):
+        u = self.rng.random()
+        if self.s == 1:
+            rank = (self.n + 1) ** u
+        else:
+            power = 1 - self.s
+            rank = (((self.n + 1) ** power - 1) * u + 1) ** (1 / power)
+        return min(int(rank), self.n)
+
+
+def zipf_counts(total, n, s, limit):
+    """Раскладывает total объектов по n номерам пропорционально
+    1 / rank ** s, но не больше limit на номер: то, что не поместилось
+    в первые номера, делится между следующими."""
+    weights = [rank ** -s for rank in range(1, n + 1)]
+    remaining_weight = sum(weights)
+    counts = []
+    for weight in weights:
+        count = min(round(total * weight / remaining_weight), limit)
+        counts.append(count)
+        total -= count
+        remaining_weight -= weight
+    return counts
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def in_batches(objects, batch_size):
+    iterator = iter(objects)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+class DataGenerator:
+    """Генератор синтетических данных для нагрузочных тестов.
+
+    Объекты создаются bulk_create пачками по batch_size с заранее
+    вычисленными id, поэтому связи строятся без чтения из базы.
+    Отзывы распределяются по произведениям по закону Ципфа с
+    параметром zipf: несколько популярных произведений собирают
+    большую часть отзывов, у остальных их единицы или нет совсем.
+    Так же неравномерно распределены комментарии по отзывам
+    и произведения по жанрам и категориям. Одинаковый seed дает
+    одинаковые данные."""
+
+    def __init__(self, users, titles, reviews, comments, genres,
+                 categories, zipf, seed, batch_size):
+        self.numbers = {
+            'users': users,
+            'titles': titles,
+            'reviews': reviews,
+            'comments': comments,
+            'genres': genres,
+            'categories': categories,
+        }
+        self.zipf = zipf
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+
+    def generate(self):
+        """Создает данные и возвращает число созданных объектов
+        по моделям."""
+        with transaction.atomic():
+            created = {
+                'users': self.create_users(),
+                'categories': self.create_categories(),
+                'genres': self.create_genres(),
+                'titles': self.create_titles(),
+            }
+            created['reviews'] = self.create_reviews()
+            created['comments'] = self.create_comments(created['reviews'])
+            # bulk_create не отправляет сигналы, поэтому рейтинги
+            # и счетчики комментариев пересчитываются целиком.
+            recalculate_counters()
+        bump_generation(User, Category, Genre, Title, Review, Comment)
+        return created
+
+    def text(self, low, high):
+        return ' '.join(
+            self.rng.choices(WORDS, k=self.rng.randint(low, high))
+        ).capitalize()
+
+    def bulk_create(self, model, objects):
+        count = 0
+        for batch in in_batches(objects, self.batch_size):
+            model.objects.bulk_create(batch)
+            count += len(batch)
+        return count
+
+    def create_users(self):
+        self.first_user = next_id(User)
+        return self.bulk_create(User, (
+            User(id=pk, username=f'{PREFIX}_user_{pk}',
+                 email=f'{PREFIX}_user_{pk}@yamdb.fake')
+            for pk in range(
+                self.first_user, self.first_user + self.numbers['users']
+            )
+        ))
+
+    def create_categories(self):
+        self.first_category = next_id(Category)
+        return self.bulk_create(Category, (
+            Category(id=pk, name=f'Категория {pk}',
+                     slug=f'{PREFIX}-category-{pk}')
+            for pk in range(
+                self.first_category,
+                self.first_category + self.numbers['categories']
+            )
+        ))
+
+    def create_genres(self):
+        self.first_genre = next_id(Genre)
+        return self.bulk_create(Genre, (
+            Genre(id=pk, name=f'Жанр {pk}', slug=f'{PREFIX}-genre-{pk}')
+            for pk in range(
+                self.first_genre, self.first_genre + self.numbers['genres']
+            )
+        ))
+
+    def create_titles(self):
+        self.first_title = next_id(Title)
+        pks = range(self.first_title,
+                    self.first_title + self.numbers['titles'])
+        last_year = timezone.now().year
+        category = ZipfSampler(self.numbers['categories'], self.zipf,
+                               self.rng)
+        count = self.bulk_create(Title, (
+            Title(
+                id=pk,
+                name=self.text(1, 4),
+                year=self.rng.randint(FIRST_YEAR, last_year),
+                description=self.text(5, 20),
+                category_id=(
+                    self.first_category + category() - 1
+                    if self.numbers['categories'] else None
+                ),
+            )
+            for pk in pks
+        ))
+        if self.numbers['genres']:
+            self.bulk_create(Title.genre.through, self.genre_titles(pks))
+        return count
+
+    def genre_titles(self, title_ids):
+        genre = ZipfSampler(self.numbers['genres'], self.zipf, self.rng)
+        for title_id in title_ids:
+            number = self.rng.randint(1, MAX_GENRES_PER_TITLE)
+            for rank in {genre() for _ in range(number)}:
+                yield Title.genre.through(
+                    title_id=title_id, genre_id=self.first_genre + rank - 1
+                )
+
+    def create_reviews(self):
+        """Отзывы на произведение с меньшим id популярнее. Авторы
+        отзывов на одно произведение не повторяются, поэтому на
+        произведение приходится не больше отзывов, чем пользователей."""
+        self.first_review = next_id(Review)
+        if not self.numbers['titles']:
+            return 0
+        counts = zipf_counts(
+            self.numbers['reviews'], self.numbers['titles'], self.zipf,
+            self.numbers['users']
+        )
+        return self.bulk_create(Review, (
+            Review(
+                id=pk, title_id=title_id, author_id=author_id,
+                text=self.text(10, 40),
+                score=self.rng.choices(SCORES, SCORE_WEIGHTS)[0],
+            )
+            for pk, (title_id, author_id) in enumerate(
+                self.review_authors(counts), self.first_review
+            )
+        ))
+
+    def review_authors(self, counts):
+        for rank, count in enumerate(counts):
+            for offset in self.rng.sample(range(self.numbers['users']),
+                                          count):
+                yield self.first_title + rank, self.first_user + offset
+
+    def create_comments(self, reviews):
+        """Комментарии чаще пишут к отзывам популярных произведений."""
+        if not reviews or not self.numbers['users']:
+            return 0
+        review = ZipfSampler(reviews, self.zipf, self.rng)
+        return self.bulk_create(Comment, (
+            Comment(
+                review_id=self.first_review + review() - 1,
+                author_id=(
+                    self.first_user
+                    + self.rng.randrange(self.numbers['users'])
+                ),
+                text=self.text(3, 20),
+            )
+            for _ in range(self.numbers['comments'])
+        ))
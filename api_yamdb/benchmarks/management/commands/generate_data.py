@@ -0,0 +1,94 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.data import DataGenerator
+
+
+class Command(BaseCommand):
+
+    help = ('Generates synthetic users, catalog, reviews and comments '
+            'for load testing. Reviews per title and comments per review '
+            'follow a Zipf distribution.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=1000,
+            help='Number of users.',
+        )
+        parser.add_argument(
+            '--titles',
+            type=int,
+            default=1000,
+            help='Number of titles.',
+        )
+        parser.add_argument(
+            '--reviews',
+            type=int,
+            default=20000,
+            help='Number of reviews; a title gets at most one review '
+                 'per generated user.',
+        )
+        parser.add_argument(
+            '--comments',
+            type=int,
+            default=20000,
+            help='Number of comments.',
+        )
+        parser.add_argument(
+            '--genres',
+            type=int,
+            default=20,
+            help='Number of genres.',
+        )
+        parser.add_argument(
+            '--categories',
+            type=int,
+            default=8,
+            help='Number of categories.',
+        )
+        parser.add_argument(
+            '--zipf',
+            type=float,
+            default=1.1,
+            help='Zipf exponent; larger values concentrate reviews on '
+                 'fewer titles.',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed; the same seed generates the same data.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of objects inserted with one query.',
+        )
+
+    def handle(self, *args, **options):
+        numbers = ('users', 'titles', 'reviews', 'comments', 'genres',
+                   'categories')
+        if any(options[name] < 0 for name in numbers):
+            raise CommandError('Numbers of objects must not be negative.')
+        if options['zipf'] <= 0:
+            raise CommandError('--zipf must be positive.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+        generator = DataGenerator(
+            **{name: options[name] for name in numbers},
+            zipf=options['zipf'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+        )
+        started = time.monotonic()
+        created = generator.generate()
+        elapsed = time.monotonic() - started
+        for name, count in created.items():
+            self.stdout.write(f'{name}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {sum(created.values())} objects in {elapsed:.2f}s.'
+        ))
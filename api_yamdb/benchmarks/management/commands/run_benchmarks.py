@@ -0,0 +1,144 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.suite import SCENARIOS, run_suite
+from reviews.models import Title
+
+
+def compare(report, baseline):
+    """Строки сравнения p95 и числа запросов к базе с прошлым отчетом
+    и наибольший рост p95 в процентах."""
+    lines = []
+    worst = None
+    for name, summary in report['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous or 'p95_ms' not in previous or (
+            'p95_ms' not in summary
+        ):
+            continue
+        change = 0
+        if previous['p95_ms']:
+            change = (summary['p95_ms'] / previous['p95_ms'] - 1) * 100
+        worst = change if worst is None else max(worst, change)
+        lines.append(
+            f'{name}: p95 {previous["p95_ms"]:.2f} -> '
+            f'{summary["p95_ms"]:.2f} ms ({change:+.1f}%), queries '
+            f'{previous["queries_per_request"]:.2f} -> '
+            f'{summary["queries_per_request"]:.2f}'
+        )
+    return lines, worst
+
+
+class Command(BaseCommand):
+
+    help = ('Runs load-testing scenarios against the key endpoints '
+            'in process and reports p50/p95/p99 latency and queries per '
+            'request as JSON. Data created by the scenarios is rolled '
+            'back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenarios',
+            nargs='+',
+            choices=tuple(SCENARIOS),
+            default=tuple(SCENARIOS),
+            help='Run only these scenarios.',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Number of measured requests per scenario.',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=20,
+            help='Number of unmeasured requests before each scenario.',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed; the same seed sends the same requests.',
+        )
+        parser.add_argument(
+            '--zipf',
+            type=float,
+            default=1.1,
+            help='Zipf exponent of title popularity.',
+        )
+        parser.add_argument(
+            '--cold-cache',
+            action='store_true',
+            help='Clear the cache before every request.',
+        )
+        parser.add_argument(
+            '--output',
+            help='Write the JSON report to this file instead of stdout.',
+        )
+        parser.add_argument(
+            '--baseline',
+            help='Compare p95 latency and queries with this JSON report.',
+        )
+        parser.add_argument(
+            '--max-regression',
+            type=float,
+            help='Fail if p95 latency of a scenario grew by more than '
+                 'this many percent against --baseline.',
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['warmup'] < 0:
+            raise CommandError(
+                '--requests must be positive and --warmup not negative.'
+            )
+        if options['zipf'] <= 0:
+            raise CommandError('--zipf must be positive.')
+        if not Title.objects.exists():
+            raise CommandError(
+                'No titles in the database, run generate_data first.'
+            )
+        baseline = self.load_baseline(options['baseline'])
+        report = run_suite(
+            options['scenarios'], options['requests'],
+            warmup=options['warmup'], seed=options['seed'],
+            zipf=options['zipf'], cold_cache=options['cold_cache'],
+        )
+        content = json.dumps(report, indent=2)
+        if options['output']:
+            Path(options['output']).write_text(content + '\n')
+            self.write_summary(report)
+        else:
+            self.stdout.write(content)
+        if baseline is not None:
+            self.check_regression(report, baseline, options['max_regression'])
+
+    def load_baseline(self, path):
+        if not path:
+            return None
+        try:
+            return json.loads(Path(path).read_text())
+        except (OSError, ValueError) as error:
+            raise CommandError(f'cannot read {path}: {error}')
+
+    def write_summary(self, report):
+        for name, summary in report['scenarios'].items():
+            self.stdout.write(
+                f'{name}: p50 {summary.get("p50_ms", 0):.2f} ms, '
+                f'p95 {summary.get("p95_ms", 0):.2f} ms, '
+                f'p99 {summary.get("p99_ms", 0):.2f} ms, '
+                f'{summary.get("queries_per_request", 0):.2f} '
+                f'queries/request, errors {summary["errors"]}.'
+            )
+
+    def check_regression(self, report, baseline, limit):
+        lines, worst = compare(report, baseline)
+        for line in lines:
+            self.stdout.write(line)
+        if limit is not None and worst is not None and worst > limit:
+            raise CommandError(
+                f'p95 latency grew by {worst:.1f}%, more than {limit}%.'
+            )
@@ -0,0 +1,314 @@
+import math
+import random
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.authentication import (
+    USER_CACHE_KEY, USER_CHANGED_KEY, get_access_token
+)
+from api.cache import bump_generation
+from api.confirmation import issue_code
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+from .data import WORDS, ZipfSampler
+
+TITLES_URL = '/api/v1/titles/'
+REVIEWS_URL = '/api/v1/titles/{}/reviews/'
+COMMENTS_URL = '/api/v1/titles/{}/reviews/{}/comments/'
+SIGNUP_URL = '/api/v1/auth/signup/'
+TOKEN_URL = '/api/v1/auth/token/'
+PERCENTILES = (50, 95, 99)
+
+BenchmarkRequest = namedtuple(
+    'BenchmarkRequest', ('method', 'path', 'data', 'token')
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Dataset:
+    """Данные базы, из которых сценарии составляют запросы.
+
+    Произведения выбираются по закону Ципфа, как при генерации данных:
+    популярные произведения запрашиваются чаще. Отзыв выбирается
+    равномерно по id, поэтому тоже чаще попадает на популярные
+    произведения."""
+
+    def __init__(self, rng, zipf):
+        self.rng = rng
+        self.zipf = zipf
+        self.title_ids = list(
+            Title.objects.order_by('pk').values_list('pk', flat=True)
+        )
+        self.genres = list(Genre.objects.values_list('slug', flat=True))
+        self.categories = list(
+            Category.objects.values_list('slug', flat=True)
+        )
+        self.review_ids = Review.objects.aggregate(
+            first=Min('pk'), last=Max('pk')
+        )
+        self.title = ZipfSampler(len(self.title_ids), zipf, rng)
+        self.users = 0
+        self.created_user_ids = []
+
+    def sizes(self):
+        return {
+            'users': User.objects.count(),
+            'titles': len(self.title_ids),
+            'reviews': Review.objects.count(),
+            'comments': Comment.objects.count(),
+            'genres': len(self.genres),
+            'categories': len(self.categories),
+        }
+
+    def popular_title(self):
+        return self.title_ids[self.title() - 1]
+
+    def random_review(self):
+        """(id произведения, id отзыва) или None, если отзывов нет."""
+        if self.review_ids['first'] is None:
+            return None
+        pk = self.rng.randint(self.review_ids['first'],
+                              self.review_ids['last'])
+        return Review.objects.filter(pk__gte=pk).order_by('pk').values_list(
+            'title_id', 'pk'
+        ).first()
+
+    def words(self, low, high):
+        return ' '.join(
+            self.rng.choices(WORDS, k=self.rng.randint(low, high))
+        )
+
+    def unique_name(self):
+        self.users += 1
+        return f'benchmark_{time.time_ns()}_{self.users}'
+
+    def create_users(self, number):
+        names = [self.unique_name() for _ in range(number)]
+        User.objects.bulk_create(
+            User(username=name, email=f'{name}@yamdb.fake') for name in names
+        )
+        users = list(User.objects.filter(username__in=names))
+        self.created_user_ids.extend(user.pk for user in users)
+        return users
+
+
+def titles_list(dataset, number):
+    pages = ZipfSampler(
+        max(math.ceil(len(dataset.title_ids)
+                      / settings.REST_FRAMEWORK['PAGE_SIZE']), 1),
+        dataset.zipf, dataset.rng
+    )
+    return [
+        BenchmarkRequest('get', f'{TITLES_URL}?page={pages()}', None, None)
+        for _ in range(number)
+    ]
+
+
+def titles_filter(dataset, number):
+    requests = []
+    for _ in range(number):
+        params = []
+        if dataset.genres:
+            params.append(f'genre={dataset.rng.choice(dataset.genres)}')
+        if dataset.categories:
+            params.append(
+                f'category={dataset.rng.choice(dataset.categories)}'
+            )
+        requests.append(BenchmarkRequest(
+            'get', f'{TITLES_URL}?{"&".join(params)}', None, None
+        ))
+    return requests
+
+
+def titles_search(dataset, number):
+    return [
+        BenchmarkRequest(
+            'get', f'{TITLES_URL}?search={dataset.words(1, 2)}', None, None
+        )
+        for _ in range(number)
+    ]
+
+
+def reviews_list(dataset, number):
+    return [
+        BenchmarkRequest(
+            'get', REVIEWS_URL.format(dataset.popular_title()), None, None
+        )
+        for _ in range(number)
+    ]
+
+
+def review_create(dataset, number):
+    """Каждый отзыв пишет новый пользователь: повторный отзыв
+    на произведение был бы отклонен."""
+    return [
+        BenchmarkRequest(
+            'post', REVIEWS_URL.format(dataset.popular_title()),
+            {'text': dataset.words(10, 40),
+             'score': dataset.rng.randint(1, 10)},
+            str(get_access_token(user)),
+        )
+        for user in dataset.create_users(number)
+    ]
+
+
+def comments_list(dataset, number):
+    requests = []
+    for _ in range(number):
+        review = dataset.random_review()
+        if review is None:
+            break
+        requests.append(BenchmarkRequest(
+            'get', COMMENTS_URL.format(*review), None, None
+        ))
+    return requests
+
+
+def signup(dataset, number):
+    requests = []
+    for _ in range(number):
+        name = dataset.unique_name()
+        requests.append(BenchmarkRequest(
+            'post', SIGNUP_URL,
+            {'username': name, 'email': f'{name}@yamdb.fake'}, None
+        ))
+    return requests
+
+
+def token(dataset, number):
+    return [
+        BenchmarkRequest(
+            'post', TOKEN_URL,
+            {'username': user.username,
+             'confirmation_code': issue_code(user)},
+            None,
+        )
+        for user in dataset.create_users(number)
+    ]
+
+
+SCENARIOS = {
+    'titles_list': titles_list,
+    'titles_filter': titles_filter,
+    'titles_search': titles_search,
+    'reviews_list': reviews_list,
+    'review_create': review_create,
+    'comments_list': comments_list,
+    'signup': signup,
+    'token': token,
+}
+
+
+def percentile(values, percent):
+    """Процентиль с линейной интерполяцией между соседними значениями."""
+    values = sorted(values)
+    position = (len(values) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (
+        position - lower
+    )
+
+
+def send(client, request):
+    headers = {}
+    if request.token:
+        headers['HTTP_AUTHORIZATION'] = f'Bearer {request.token}'
+    if request.method == 'get':
+        return client.get(request.path, **headers)
+    return getattr(client, request.method)(
+        request.path, request.data, content_type='application/json',
+        **headers
+    )
+
+
+def measure(client, requests, cold_cache):
+    """Время ответа в миллисекундах и число запросов к базе
+    для каждого запроса."""
+    latencies = []
+    queries = []
+    errors = 0
+    for request in requests:
+        if cold_cache:
+            cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            response = send(client, request)
+            latencies.append((time.perf_counter() - started) * 1000)
+        queries.append(len(context.captured_queries))
+        if response.status_code >= 400:
+            errors += 1
+    return latencies, queries, errors
+
+
+def summarize(latencies, queries, errors):
+    summary = {'requests': len(latencies), 'errors': errors}
+    if not latencies:
+        return summary
+    summary['mean_ms'] = round(sum(latencies) / len(latencies), 3)
+    for percent in PERCENTILES:
+        summary[f'p{percent}_ms'] = round(percentile(latencies, percent), 3)
+    summary['max_ms'] = round(max(latencies), 3)
+    summary['queries_per_request'] = round(sum(queries) / len(queries), 3)
+    summary['max_queries'] = max(queries)
+    return summary
+
+
+def run_suite(scenarios, requests, warmup=0, seed=0, zipf=1.1,
+              cold_cache=False):
+    """Выполняет сценарии через тестовый клиент Django и возвращает
+    отчет: размер данных, параметры запуска и по каждому сценарию
+    процентили времени ответа и число запросов к базе.
+
+    Весь прогон идет в транзакции, которая откатывается, поэтому
+    созданные сценариями пользователи и отзывы не остаются в базе.
+    Лимиты частоты запросов на время прогона отключены. Первые warmup
+    запросов сценария не учитываются."""
+    rng = random.Random(seed)
+    client = Client()
+    report = {
+        'options': {
+            'requests': requests,
+            'warmup': warmup,
+            'seed': seed,
+            'zipf': zipf,
+            'cold_cache': cold_cache,
+        },
+        'scenarios': {},
+    }
+    unlimited = {scope: {} for scope in settings.THROTTLE_RATES}
+    try:
+        with transaction.atomic(), override_settings(
+            THROTTLE_RATES=unlimited
+        ):
+            dataset = Dataset(rng, zipf)
+            report['dataset'] = dataset.sizes()
+            for name in scenarios:
+                batch = SCENARIOS[name](dataset, warmup + requests)
+                measure(client, batch[:warmup], cold_cache)
+                report['scenarios'][name] = summarize(
+                    *measure(client, batch[warmup:], cold_cache)
+                )
+            raise Rollback
+    except Rollback:
+        pass
+    # Откат не затрагивает кэш: ответы с созданными отзывами и
+    # пользователи, чьи id база выдаст снова, не должны из него читаться.
+    cache.delete_many([
+        key.format(pk)
+        for pk in dataset.created_user_ids
+        for key in (USER_CACHE_KEY, USER_CHANGED_KEY)
+    ])
+    bump_generation(User, Title, Review, Comment)
+    return report
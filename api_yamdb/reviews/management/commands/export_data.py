@@ -0,0 +1,186 @@
+import csv
+import gzip
+import json
+import os
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from api.metrics import export_duration, export_rows, registry
+
+from .import_files import LIST_MODEL
+
+DEFAULT_CHUNK_SIZE = 2000
+FORMATS = ('csv', 'ndjson')
+# Адреса почты и роли пользователей выгружаются только с --include-users.
+USER_MODEL = 'User'
+DEFAULT_MODELS = tuple(name for name in LIST_MODEL if name != USER_MODEL)
+
+
+def get_columns(params):
+    """Колонки выгрузки совпадают с колонками файлов import_files,
+    поэтому выгруженные данные можно загрузить обратно."""
+    columns = [
+        (column, field) for field, column in {
+            **params['fields'], **params.get('optional_fields', {})
+        }.items()
+    ]
+    columns.extend(
+        (column, field)
+        for field, (column, _) in params.get('foreign_keys', {}).items()
+    )
+    return columns
+
+
+def serialize_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+class CsvWriter:
+
+    def __init__(self, stream, header):
+        self.writer = csv.writer(stream)
+        self.writer.writerow(header)
+
+    def write(self, row):
+        self.writer.writerow([serialize_value(value) for value in row])
+
+
+class NdjsonWriter:
+
+    def __init__(self, stream, header):
+        self.stream = stream
+        self.header = header
+
+    def write(self, row):
+        self.stream.write(json.dumps(
+            dict(zip(self.header, row)),
+            ensure_ascii=False, cls=DjangoJSONEncoder
+        ))
+        self.stream.write('\n')
+
+
+WRITERS = {'csv': CsvWriter, 'ndjson': NdjsonWriter}
+
+
+class Command(BaseCommand):
+
+    help = 'Exports catalog, reviews and comments to csv or ndjson.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            default='csv',
+            help='Output format.',
+        )
+        parser.add_argument(
+            '--output-dir',
+            default='export',
+            help='Directory for exported files.',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Compress exported files with gzip.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Number of rows fetched from the database at a time.',
+        )
+        parser.add_argument(
+            '--models',
+            nargs='+',
+            choices=tuple(LIST_MODEL),
+            help='Export only these models.',
+        )
+        parser.add_argument(
+            '--include-users',
+            action='store_true',
+            help='Also export users with their emails and roles.',
+        )
+        parser.add_argument(
+            '--benchmark',
+            action='store_true',
+            help='Serialize rows without writing files and report '
+                 'throughput only.',
+        )
+
+    def handle(self, *args, **options):
+        models = self.get_models(options)
+        output_dir = Path(options['output_dir'])
+        if not options['benchmark']:
+            output_dir.mkdir(parents=True, exist_ok=True)
+        total_rows = 0
+        started = time.monotonic()
+        for name in models:
+            params = LIST_MODEL[name]
+            if options['benchmark']:
+                path = Path(os.devnull)
+            else:
+                path = output_dir / self.get_filename(params, options)
+            total_rows += self.export_model(name, params, path, options)
+        registry.flush()
+        elapsed = time.monotonic() - started
+        rate = total_rows / elapsed if elapsed else total_rows
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported {total_rows} rows in {elapsed:.2f}s '
+            f'({rate:.0f} rows/s).'
+        ))
+
+    def get_models(self, options):
+        models = options['models']
+        if models is None:
+            models = DEFAULT_MODELS
+            if options['include_users']:
+                models = (USER_MODEL,) + models
+        elif USER_MODEL in models and not options['include_users']:
+            raise CommandError(
+                'User export contains emails and roles; '
+                'pass --include-users to export it.'
+            )
+        return models
+
+    def get_filename(self, params, options):
+        filename = Path(params['file']).stem + '.' + options['format']
+        if options['gzip']:
+            filename += '.gz'
+        return filename
+
+    def open_output(self, path, options):
+        if options['gzip'] and not options['benchmark']:
+            return gzip.open(path, 'wt', encoding='utf-8', newline='')
+        return open(path, 'w', encoding='utf-8', newline='')
+
+    def export_model(self, name, params, path, options):
+        columns = get_columns(params)
+        header = [column for column, _ in columns]
+        # values_list и iterator не создают объекты моделей и не держат
+        # всю выборку в памяти: строки читаются пачками по chunk_size.
+        rows = params['model'].objects.order_by('pk').values_list(
+            *(field for _, field in columns)
+        ).iterator(chunk_size=options['chunk_size'])
+        started = time.monotonic()
+        count = 0
+        try:
+            with self.open_output(path, options) as stream:
+                writer = WRITERS[options['format']](stream, header)
+                for row in rows:
+                    writer.write(row)
+                    count += 1
+        except OSError as error:
+            raise CommandError(f'{name}: cannot write {path}: {error}')
+        elapsed = time.monotonic() - started
+        export_rows.inc(count, model=name)
+        export_duration.inc(elapsed, model=name)
+        rate = count / elapsed if elapsed else count
+        self.stdout.write(
+            f'{name}: {count} rows in {elapsed:.2f}s ({rate:.0f} rows/s).'
+        )
+        return count
@@ -1,130 +1,383 @@
 import csv
+import threading
+import time
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
 
-import django.db.utils
-from django.core.management.base import BaseCommand
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
 
-from reviews.models import Genre, Category, Title, Review, Comment
+from api.cache import bump_generation
+from api.metrics import import_duration, import_rows, registry
+from reviews.models import (Genre, Category, Title, Review, Comment,
+                            ImportCheckpoint)
+from reviews.search import triggers_suspended
 from users.models import User
 
+from .recalculate_counters import recalculate_counters
 
+DATA_DIR = settings.BASE_DIR / 'static' / 'data'
+DEFAULT_BATCH_SIZE = 1000
+
+# Порядок загрузки учитывает внешние ключи: 'fields' - поля модели
+# и колонки csv, 'optional_fields' - то же для колонок, которых может
+# не быть в файле, 'foreign_keys' - поля с id связанных объектов,
+# колонки csv и модели, среди объектов которой id должен существовать.
 LIST_MODEL = {
-    'User': {'model': User, 'file': 'static/data/users.csv'},
+    'User': {
+        'model': User,
+        'file': 'users.csv',
+        'fields': {
+            'id': 'id', 'username': 'username', 'email': 'email',
+            'role': 'role', 'bio': 'bio', 'first_name': 'first_name',
+            'last_name': 'last_name',
+        },
+    },
     'Genre': {
-        'model': Genre, 'file': [
-            'static/data/genre.csv', 'static/data/genre_title.csv'
-        ]
+        'model': Genre,
+        'file': 'genre.csv',
+        'fields': {'id': 'id', 'name': 'name', 'slug': 'slug'},
+    },
+    'Category': {
+        'model': Category,
+        'file': 'category.csv',
+        'fields': {'id': 'id', 'name': 'name', 'slug': 'slug'},
+    },
+    'Title': {
+        'model': Title,
+        'file': 'titles.csv',
+        'fields': {'id': 'id', 'name': 'name', 'year': 'year'},
+        'optional_fields': {'description': 'description'},
+        'foreign_keys': {'category_id': ('category', Category)},
+    },
+    'GenreTitle': {
+        'model': Title.genre.through,
+        'file': 'genre_title.csv',
+        'fields': {'id': 'id'},
+        'foreign_keys': {
+            'title_id': ('title_id', Title),
+            'genre_id': ('genre_id', Genre),
+        },
+    },
+    'Review': {
+        'model': Review,
+        'file': 'review.csv',
+        'fields': {
+            'id': 'id', 'text': 'text', 'score': 'score',
+            'pub_date': 'pub_date',
+        },
+        'foreign_keys': {
+            'title_id': ('title_id', Title),
+            'author_id': ('author', User),
+        },
+    },
+    'Comment': {
+        'model': Comment,
+        'file': 'comments.csv',
+        'fields': {'id': 'id', 'text': 'text', 'pub_date': 'pub_date'},
+        'foreign_keys': {
+            'review_id': ('review_id', Review),
+            'author_id': ('author', User),
+        },
     },
-    'Category': {'model': Category, 'file': 'static/data/category.csv'},
-    'Title': {'model': Title, 'file': 'static/data/titles.csv'},
-    'Review': {'model': Review, 'file': 'static/data/review.csv'},
-    'Comment': {'model': Comment, 'file': 'static/data/comments.csv'},
-
 }
 
 
+def read_rows(path, offset=0):
+    """Построчно читает csv-файл, начиная с байта offset.
+
+    Возвращает пары (строка, позиция в байтах после нее), по которым
+    загрузку можно продолжить. Записи с переносами строк внутри кавычек
+    поддерживаются: csv.reader забирает строки файла по одной."""
+    with open(path, 'rb') as csvfile:
+        header = next(csv.reader([csvfile.readline().decode('utf-8')]))
+        position = max(offset, csvfile.tell())
+        csvfile.seek(position)
+
+        def lines():
+            nonlocal position
+            for line in csvfile:
+                position += len(line)
+                yield line.decode('utf-8')
+
+        for values in csv.reader(lines()):
+            yield dict(zip(header, values)), position
+
+
+def get_dependencies(name):
+    """Возвращает имена этапов LIST_MODEL, на модели которых ссылаются
+    внешние ключи этапа name: он начинается только после них."""
+    models = {
+        model for _, model in LIST_MODEL[name].get(
+            'foreign_keys', {}
+        ).values()
+    }
+    return {
+        other for other, params in LIST_MODEL.items()
+        if params['model'] in models
+    }
+
+
+def query_existing_ids(model, ids):
+    return set(model.objects.filter(pk__in=ids).values_list('pk', flat=True))
+
+
+def build_objects(rows, params, get_existing_ids):
+    """Создает объекты модели по строкам csv, пропуская строки,
+    внешние ключи которых ссылаются на несуществующие объекты."""
+    foreign_keys = params.get('foreign_keys', {})
+    existing = {
+        field: get_existing_ids(model, {int(row[column]) for row in rows})
+        for field, (column, model) in foreign_keys.items()
+    }
+    objects = []
+    for row in rows:
+        values = {
+            field: row[column] for field, column in params['fields'].items()
+        }
+        for field, column in params.get('optional_fields', {}).items():
+            if row.get(column) is not None:
+                values[field] = row[column]
+        for field, (column, _) in foreign_keys.items():
+            values[field] = int(row[column])
+        if all(values[field] in existing[field] for field in existing):
+            objects.append(params['model'](**values))
+    return objects
+
+
+def init_worker():
+    django.setup()
+    # Соединения, унаследованные от родительского процесса, использовать
+    # нельзя: каждый процесс открывает свое.
+    connections.close_all()
+
+
+def import_chunk(name, rows):
+    """Сохраняет пачку строк этапа name в отдельном процессе."""
+    params = LIST_MODEL[name]
+    objects = build_objects(rows, params, query_existing_ids)
+    with transaction.atomic():
+        params['model'].objects.bulk_create(objects, ignore_conflicts=True)
+    return len(rows), len(rows) - len(objects)
+
+
+def read_chunks(path, size):
+    chunk = []
+    for row, _ in read_rows(path):
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
 class Command(BaseCommand):
 
     help = 'Loads data from csv.'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Number of rows inserted per query and transaction.',
+        )
+        parser.add_argument(
+            '--stream',
+            action='store_true',
+            help='Check foreign keys per batch instead of preloading ids '
+                 'and save a checkpoint after each batch.',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue a streaming import from saved checkpoints; '
+                 'with --workers, skip files that were fully imported.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of processes; independent files are loaded '
+                 'concurrently and large files are split between them.',
+        )
+
     def handle(self, *args, **options):
-        with open(
-                LIST_MODEL['User']['file'], 'r', encoding='utf-8'
-        ) as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                LIST_MODEL['User']['model'].objects.get_or_create(
-                    pk=row['id'],
-                    defaults={
-                        'username': row['username'],
-                        'email': row['email'],
-                        'role': row['role'],
-                        'bio': row['bio'],
-                        'first_name': row['first_name'],
-                        'last_name': row['last_name'],
-                    },
-                )
+        self.batch_size = options['batch_size']
+        self.stream = options['stream'] or options['resume']
+        self.known_ids = {}
+        workers = options['workers']
+        if workers > 1 and options['stream']:
+            raise CommandError('--workers cannot be combined with --stream.')
+        if (self.stream or workers > 1) and not options['resume']:
+            ImportCheckpoint.objects.all().delete()
+        if workers > 1:
+            with triggers_suspended():
+                self.import_parallel(workers, options['resume'])
+        else:
+            for name, params in LIST_MODEL.items():
+                self.import_model(name, params)
+        recalculate_counters()
+        bump_generation(User, Category, Genre, Title, Review, Comment)
+        registry.flush()
 
-        with open(
-                LIST_MODEL['Genre']['file'][0], 'r', encoding='utf-8'
-        ) as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                LIST_MODEL['Genre']['model'].objects.get_or_create(
-                    pk=row['id'],
-                    defaults={
-                        'name': row['name'],
-                        'slug': row['slug'],
-                    },
-                )
+    def get_existing_ids(self, model, ids):
+        """Возвращает те из ids, объекты с которыми уже сохранены.
 
-        with open(
-                LIST_MODEL['Genre']['file'][1], 'r', encoding='utf-8'
-        ) as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                try:
-                    LIST_MODEL['Genre']['model'].objects.get(
-                        pk=row['genre_id']).titles.add(row['title_id']
-                                                       )
-                except django.db.utils.IntegrityError:
-                    continue
-
-        with open(
-                LIST_MODEL['Category']['file'], 'r', encoding='utf-8'
-        ) as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                LIST_MODEL['Category']['model'].objects.get_or_create(
-                    pk=row['id'],
-                    defaults={
-                        'name': row['name'],
-                        'slug': row['slug'],
-                    },
-                )
+        В потоковом режиме это один запрос на пачку, иначе id модели
+        загружаются один раз, чтобы не обращаться к базе на каждую пачку."""
+        if self.stream:
+            return query_existing_ids(model, ids)
+        if model not in self.known_ids:
+            self.known_ids[model] = set(
+                model.objects.values_list('pk', flat=True)
+            )
+        return self.known_ids[model] & ids
 
-        with open(
-                LIST_MODEL['Title']['file'], 'r', encoding='utf-8'
-        ) as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                LIST_MODEL['Title']['model'].objects.get_or_create(
-                    pk=row['id'],
+    def save_batch(self, params, rows, offset):
+        objects = build_objects(rows, params, self.get_existing_ids)
+        with transaction.atomic():
+            params['model'].objects.bulk_create(
+                objects, ignore_conflicts=True
+            )
+            if self.stream:
+                ImportCheckpoint.objects.update_or_create(
+                    file=params['file'],
                     defaults={
-                        'name': row['name'],
-                        'year': row['year'],
-                        'category': Category.objects.get(pk=row['category']),
+                        'offset': offset,
+                        'last_id': max(int(row['id']) for row in rows),
                     },
                 )
+        return len(rows) - len(objects)
 
-        with open(
-                LIST_MODEL['Review']['file'], 'r', encoding='utf-8'
-        ) as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                LIST_MODEL['Review']['model'].objects.get_or_create(
-                    pk=row['id'],
-                    defaults={
-                        'text': row['text'],
-                        'author': User.objects.get(pk=row['author']),
-                        'score': row['score'],
-                        'pub_date': row['pub_date'],
-                        'title': Title.objects.get(pk=row['title_id']),
-                    },
-                )
+    def import_model(self, name, params):
+        checkpoint = None
+        if self.stream:
+            checkpoint = ImportCheckpoint.objects.filter(
+                file=params['file']
+            ).first()
+        if checkpoint is not None and checkpoint.completed:
+            self.stdout.write(f'{name}: already imported, skipped.')
+            return
 
-        with open(
-                LIST_MODEL['Comment']['file'], 'r', encoding='utf-8'
-        ) as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                LIST_MODEL['Comment']['model'].objects.get_or_create(
-                    pk=row['id'],
-                    defaults={
-                        'review': Review.objects.get(
-                            pk=row['review_id']
-                        ),
-                        'author': User.objects.get(pk=row['author']),
-                        'text': row['text'],
-                        'pub_date': row['pub_date'],
-                    },
-                )
+        started = time.monotonic()
+        rows = skipped = 0
+        batch = []
+        offset = checkpoint.offset if checkpoint else 0
+        for row, offset in read_rows(DATA_DIR / params['file'], offset):
+            rows += 1
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                skipped += self.save_batch(params, batch, offset)
+                batch = []
+        if batch:
+            skipped += self.save_batch(params, batch, offset)
+        if self.stream:
+            ImportCheckpoint.objects.update_or_create(
+                file=params['file'],
+                defaults={'offset': offset, 'completed': True},
+            )
+        self.known_ids.pop(params['model'], None)
+
+        elapsed = time.monotonic() - started
+        import_rows.inc(rows, model=name)
+        import_duration.inc(elapsed, model=name)
+        rate = rows / elapsed if elapsed else rows
+        self.stdout.write(
+            f'{name}: {rows} rows in {elapsed:.2f}s '
+            f'({rate:.0f} rows/s), skipped {skipped}.'
+        )
+
+    def import_parallel(self, workers, resume=False):
+        """Загружает файлы в пуле процессов.
+
+        Для каждого этапа LIST_MODEL работает поток, который ждет
+        завершения этапов из get_dependencies, читает файл пачками
+        и отправляет их в пул. Число пачек в работе ограничено, чтобы
+        память не зависела от размера файла.
+
+        Пачки сохраняются не по порядку, поэтому контрольная точка
+        ставится на весь файл после его загрузки: с resume загруженные
+        файлы пропускаются, а прерванный загружается заново."""
+        connections.close_all()
+        done = {name: threading.Event() for name in LIST_MODEL}
+        failed = set()
+
+        def run_stage(name):
+            try:
+                for dependency in get_dependencies(name):
+                    done[dependency].wait()
+                if failed & get_dependencies(name):
+                    raise CommandError(
+                        f'{name}: skipped, dependencies failed.'
+                    )
+                file = LIST_MODEL[name]['file']
+                if resume and ImportCheckpoint.objects.filter(
+                    file=file, completed=True
+                ).exists():
+                    self.stdout.write(f'{name}: already imported, skipped.')
+                    return
+                self.import_stage(pool, name, workers)
+                # Отдельные запросы без транзакции: чтение и запись в одной
+                # транзакции SQLite при параллельной загрузке приводят
+                # к взаимной блокировке с процессами пула.
+                if not ImportCheckpoint.objects.filter(file=file).update(
+                    completed=True
+                ):
+                    ImportCheckpoint.objects.create(file=file, completed=True)
+            except Exception:
+                failed.add(name)
+                raise
+            finally:
+                done[name].set()
+                # Соединения потоков этапов закрываются вместе с ними.
+                connections.close_all()
+
+        with ProcessPoolExecutor(workers, initializer=init_worker) as pool:
+            # Процессы пула создаются при первой задаче. Они должны
+            # появиться до потоков этапов: процесс, скопированный fork
+            # в момент, когда поток держит блокировку, зависает на ней.
+            pool.submit(int).result()
+            with ThreadPoolExecutor(len(LIST_MODEL)) as stages:
+                futures = [
+                    stages.submit(run_stage, name) for name in LIST_MODEL
+                ]
+            errors = [
+                str(future.exception()) for future in futures
+                if future.exception()
+            ]
+        if errors:
+            raise CommandError('\n'.join(errors))
+
+    def import_stage(self, pool, name, workers):
+        started = time.monotonic()
+        rows = skipped = 0
+        pending = set()
+
+        def collect(futures):
+            nonlocal rows, skipped
+            for future in futures:
+                chunk_rows, chunk_skipped = future.result()
+                rows += chunk_rows
+                skipped += chunk_skipped
+
+        for chunk in read_chunks(
+            DATA_DIR / LIST_MODEL[name]['file'], self.batch_size
+        ):
+            pending.add(pool.submit(import_chunk, name, chunk))
+            if len(pending) >= 2 * workers:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+        collect(wait(pending).done)
+
+        elapsed = time.monotonic() - started
+        import_rows.inc(rows, model=name)
+        import_duration.inc(elapsed, model=name)
+        rate = rows / elapsed if elapsed else rows
+        self.stdout.write(
+            f'{name}: {rows} rows in {elapsed:.2f}s '
+            f'({rate:.0f} rows/s), skipped {skipped}.'
+        )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import bump_generation
+from reviews.models import Review, Title
+from reviews.search import rebuild_index
+
+
+class Command(BaseCommand):
+
+    help = 'Rebuilds full-text search indexes of titles and reviews.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--optimize',
+            action='store_true',
+            help='Merge index segments after rebuilding.',
+        )
+
+    def handle(self, *args, **options):
+        rebuild_index(optimize=options['optimize'])
+        bump_generation(Title, Review)
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {Title.objects.count()} titles '
+            f'and {Review.objects.count()} reviews.'
+        ))
@@ -0,0 +1,99 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import (Count, F, FloatField, IntegerField, OuterRef,
+                              Subquery, Sum)
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+from api.cache import bump_generation
+from reviews.models import Comment, Review, Title
+
+
+def aggregate_subquery(queryset, aggregate):
+    """Коррелированный подзапрос с агрегатом, 0 при отсутствии строк."""
+    return Coalesce(
+        Subquery(queryset.annotate(total=aggregate).values('total'),
+                 output_field=IntegerField()),
+        0,
+    )
+
+
+def rating_subqueries():
+    """Подзапросы с фактической суммой и количеством оценок произведения."""
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    return (aggregate_subquery(reviews, Sum('score')),
+            aggregate_subquery(reviews, Count('pk')))
+
+
+def comments_count_subquery():
+    """Подзапрос с фактическим количеством комментариев к отзыву."""
+    comments = Comment.objects.filter(
+        review=OuterRef('pk')
+    ).order_by().values('review')
+    return aggregate_subquery(comments, Count('pk'))
+
+
+def recalculate_counters():
+    """Пересчитывает рейтинги произведений и счетчики комментариев."""
+    score_sum, score_count = rating_subqueries()
+    titles = Title.objects.update(
+        rating_sum=score_sum,
+        rating_count=score_count,
+        rating=Cast(score_sum, FloatField()) / NullIf(score_count, 0),
+    )
+    reviews = Review.objects.update(comments_count=comments_count_subquery())
+    return titles, reviews
+
+
+def find_mismatches():
+    """Возвращает id произведений и отзывов, у которых сохраненные
+    счетчики расходятся с фактическими данными."""
+    score_sum, score_count = rating_subqueries()
+    titles = Title.objects.annotate(
+        actual_sum=score_sum, actual_count=score_count
+    ).exclude(
+        rating_sum=F('actual_sum'), rating_count=F('actual_count')
+    ).order_by('pk').values_list('pk', flat=True)
+    reviews = Review.objects.annotate(
+        actual_count=comments_count_subquery()
+    ).exclude(
+        comments_count=F('actual_count')
+    ).order_by('pk').values_list('pk', flat=True)
+    return list(titles), list(reviews)
+
+
+class Command(BaseCommand):
+
+    help = 'Recalculates and verifies denormalized counters.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only verify stored counters, do not update them.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            with transaction.atomic():
+                titles, reviews = recalculate_counters()
+            bump_generation(Title, Review)
+            self.stdout.write(
+                f'Recalculated counters for {titles} titles '
+                f'and {reviews} reviews.'
+            )
+        titles, reviews = find_mismatches()
+        errors = []
+        if titles:
+            errors.append(
+                f'rating mismatch for titles: {", ".join(map(str, titles))}'
+            )
+        if reviews:
+            errors.append(
+                f'comments count mismatch for reviews: '
+                f'{", ".join(map(str, reviews))}'
+            )
+        if errors:
+            raise CommandError('; '.join(errors))
+        self.stdout.write(self.style.SUCCESS('All counters are valid.'))
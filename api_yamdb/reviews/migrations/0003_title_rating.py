@@ -0,0 +1,55 @@
+# Generated by Django 3.2 on 2026-10-18 16:35
+
+from django.db import migrations, models
+from django.db.models import (Count, FloatField, IntegerField, OuterRef,
+                              Subquery, Sum)
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+
+def fill_ratings(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Title = apps.get_model('reviews', 'Title')
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    score_sum = Coalesce(
+        Subquery(reviews.annotate(total=Sum('score')).values('total'),
+                 output_field=IntegerField()),
+        0,
+    )
+    score_count = Coalesce(
+        Subquery(reviews.annotate(total=Count('pk')).values('total'),
+                 output_field=IntegerField()),
+        0,
+    )
+    Title.objects.update(
+        rating_sum=score_sum,
+        rating_count=score_count,
+        rating=Cast(score_sum, FloatField()) / NullIf(score_count, 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(editable=False, help_text='Средняя оценка, пересчитывается при изменении отзывов', null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Количество отзывов на произведение', verbose_name='Количество оценок'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Сумма оценок всех отзывов на произведение', verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(fill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2 on 2026-10-18 16:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_pub_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, help_text='Автоматическое обновление при изменении', verbose_name='Дата и время изменения'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, help_text='Автоматическое обновление при изменении', verbose_name='Дата и время изменения'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, help_text='Автоматическое обновление при изменении', verbose_name='Дата и время изменения'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2 on 2026-10-18 16:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.CharField(help_text='Имя загружаемого csv-файла', max_length=256, unique=True, verbose_name='Файл')),
+                ('offset', models.PositiveBigIntegerField(default=0, help_text='Позиция в байтах после последней сохраненной строки', verbose_name='Смещение')),
+                ('last_id', models.BigIntegerField(help_text='Наибольший id в последней сохраненной пачке', null=True, verbose_name='Последний id')),
+                ('completed', models.BooleanField(default=False, verbose_name='Загрузка завершена')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата и время изменения')),
+            ],
+            options={
+                'verbose_name': 'Контрольная точка загрузки',
+                'verbose_name_plural': 'Контрольные точки загрузки',
+                'ordering': ('file',),
+            },
+        ),
+    ]
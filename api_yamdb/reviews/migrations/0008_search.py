@@ -0,0 +1,67 @@
+# Generated by Django 3.2 on 2026-10-18 17:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+import reviews.search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_import_checkpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewIndex',
+            fields=[
+                ('review', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='reviews.review')),
+                ('document', reviews.search.SearchField(db_column='reviews_review_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'reviews_review_fts',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='TitleIndex',
+            fields=[
+                ('title', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='reviews.title')),
+                ('document', reviews.search.SearchField(db_column='reviews_title_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'reviews_title_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunSQL(
+            sql=[
+                reviews.search.TITLE_INDEX_SQL,
+                *reviews.search.TITLE_TRIGGERS_SQL,
+                "INSERT INTO reviews_title_fts(reviews_title_fts) "
+                "VALUES ('rebuild')",
+            ],
+            reverse_sql=[
+                'DROP TRIGGER IF EXISTS reviews_title_fts_insert',
+                'DROP TRIGGER IF EXISTS reviews_title_fts_delete',
+                'DROP TRIGGER IF EXISTS reviews_title_fts_update',
+                'DROP TABLE IF EXISTS reviews_title_fts',
+            ],
+        ),
+        migrations.RunSQL(
+            sql=[
+                reviews.search.REVIEW_INDEX_SQL,
+                *reviews.search.REVIEW_TRIGGERS_SQL,
+                "INSERT INTO reviews_review_fts(reviews_review_fts) "
+                "VALUES ('rebuild')",
+            ],
+            reverse_sql=[
+                'DROP TRIGGER IF EXISTS reviews_review_fts_insert',
+                'DROP TRIGGER IF EXISTS reviews_review_fts_delete',
+                'DROP TRIGGER IF EXISTS reviews_review_fts_update',
+                'DROP TABLE IF EXISTS reviews_review_fts',
+            ],
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2 on 2026-10-18 18:10
+
+from django.db import migrations
+import reviews.search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_search'),
+    ]
+
+    operations = [
+        # SQLite удаляет колонку пересозданием таблицы, и триггеры
+        # FTS5-индексов пропадают вместе со старой таблицей. При откате
+        # AddField тоже пересоздает таблицы: триггеры возвращаются
+        # последней обратной операцией.
+        migrations.RunSQL(
+            sql=migrations.RunSQL.noop,
+            reverse_sql=reviews.search.TRIGGERS_SQL,
+        ),
+        migrations.RemoveField(
+            model_name='comment',
+            name='updated_at',
+        ),
+        migrations.RemoveField(
+            model_name='review',
+            name='updated_at',
+        ),
+        migrations.RemoveField(
+            model_name='title',
+            name='updated_at',
+        ),
+        migrations.RunSQL(
+            sql=reviews.search.TRIGGERS_SQL,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
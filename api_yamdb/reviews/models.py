@@ -1,6 +1,7 @@
 from django.db import models
 from django.core.validators import MaxValueValidator, MinValueValidator
 
+from .search import REVIEW_INDEX_TABLE, TITLE_INDEX_TABLE, SearchField
 from .validators import validator_year
 from users.models import User
 
@@ -22,6 +23,28 @@ class CreatedModel(models.Model):
         abstract = True
 
 
+class CounterFieldsModel(models.Model):
+    """Абстрактная модель. Защищает денормализованные счетчики
+    от перезаписи при сохранении объекта."""
+
+    counter_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        # Счетчики меняются только атомарными UPDATE из сигналов,
+        # поэтому их устаревшие значения в памяти не должны
+        # перезаписывать базу при сохранении существующего объекта.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
 class Category(models.Model):
     """Модель Категории для произведения."""
 
@@ -72,9 +95,11 @@ class Genre(models.Model):
         return self.slug
 
 
-class Title(models.Model):
+class Title(CounterFieldsModel):
     """Модель Произведения."""
 
+    counter_fields = ('rating_sum', 'rating_count', 'rating')
+
     name = models.CharField(
         verbose_name='Произведение',
         help_text='Наименование произведения',
@@ -104,6 +129,24 @@ class Title(models.Model):
         null=True,
         on_delete=models.SET_NULL,
     )
+    rating_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        help_text='Сумма оценок всех отзывов на произведение',
+        default=0,
+        editable=False,
+    )
+    rating_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок',
+        help_text='Количество отзывов на произведение',
+        default=0,
+        editable=False,
+    )
+    rating = models.FloatField(
+        verbose_name='Рейтинг',
+        help_text='Средняя оценка, пересчитывается при изменении отзывов',
+        null=True,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Произведение'
@@ -114,9 +157,11 @@ class Title(models.Model):
         return self.name
 
 
-class Review(CreatedModel):
+class Review(CreatedModel, CounterFieldsModel):
     """Модель Отзывы для произведения."""
 
+    counter_fields = ('comments_count',)
+
     title = models.ForeignKey(
         Title,
         verbose_name='Отзыв',
@@ -142,16 +187,34 @@ class Review(CreatedModel):
             MaxValueValidator(MAXIMUM_SCORE)
         ]
     )
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Количество комментариев',
+        help_text='Количество комментариев к отзыву',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
         ordering = ('-pub_date',)
         unique_together = ['author', 'title']
+        indexes = [
+            models.Index(fields=('title', 'pub_date', 'id'),
+                         name='review_title_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text[:TEXT_SYMBOLS_NUMBER]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Оценка из базы нужна сигналам, чтобы применить к рейтингу
+        # произведения разницу, а не пересчитывать его целиком.
+        instance._loaded_score = instance.__dict__.get('score')
+        return instance
+
 
 class Comment(CreatedModel):
     """Модель Комментариев для отзыва."""
@@ -179,6 +242,87 @@ class Comment(CreatedModel):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(fields=('review', 'pub_date', 'id'),
+                         name='comment_review_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text[:TEXT_SYMBOLS_NUMBER]
+
+
+class ImportCheckpoint(models.Model):
+    """Модель Контрольной точки загрузки csv-файла командой import_files."""
+
+    file = models.CharField(
+        verbose_name='Файл',
+        help_text='Имя загружаемого csv-файла',
+        max_length=256,
+        unique=True,
+    )
+    offset = models.PositiveBigIntegerField(
+        verbose_name='Смещение',
+        help_text='Позиция в байтах после последней сохраненной строки',
+        default=0,
+    )
+    last_id = models.BigIntegerField(
+        verbose_name='Последний id',
+        help_text='Наибольший id в последней сохраненной пачке',
+        null=True,
+    )
+    completed = models.BooleanField(
+        verbose_name='Загрузка завершена',
+        default=False,
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата и время изменения',
+        auto_now=True,
+    )
+
+    class Meta:
+        verbose_name = 'Контрольная точка загрузки'
+        verbose_name_plural = 'Контрольные точки загрузки'
+        ordering = ('file',)
+
+    def __str__(self):
+        return f'{self.file}: {self.offset}'
+
+
+class TitleIndex(models.Model):
+    """Полнотекстовый индекс названий и описаний произведений.
+
+    Таблица FTS5 создается миграцией и обновляется триггерами."""
+
+    title = models.OneToOneField(
+        Title,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_index',
+        on_delete=models.DO_NOTHING,
+    )
+    document = SearchField(db_column=TITLE_INDEX_TABLE)
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = TITLE_INDEX_TABLE
+
+
+class ReviewIndex(models.Model):
+    """Полнотекстовый индекс текстов отзывов.
+
+    Таблица FTS5 создается миграцией и обновляется триггерами."""
+
+    review = models.OneToOneField(
+        Review,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_index',
+        on_delete=models.DO_NOTHING,
+    )
+    document = SearchField(db_column=REVIEW_INDEX_TABLE)
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = REVIEW_INDEX_TABLE
@@ -0,0 +1,140 @@
+import re
+from contextlib import contextmanager
+
+from django.db import connection, models
+
+TITLE_INDEX_TABLE = 'reviews_title_fts'
+REVIEW_INDEX_TABLE = 'reviews_review_fts'
+# FTS5-таблицы с внешним содержимым создаются миграцией 0008_search
+# вместе с триггерами, которые обновляют их при любом изменении строк,
+# в том числе через bulk_create и queryset.update.
+INDEXES = (TITLE_INDEX_TABLE, REVIEW_INDEX_TABLE)
+TRIGGER_EVENTS = ('insert', 'delete', 'update')
+TRIGGER_NAMES = tuple(
+    f'{index}_{event}' for index in INDEXES for event in TRIGGER_EVENTS
+)
+
+TITLE_INDEX_SQL = f"""CREATE VIRTUAL TABLE {TITLE_INDEX_TABLE}
+    USING fts5(name, description, content='reviews_title',
+               content_rowid='id',
+               tokenize='unicode61 remove_diacritics 2')"""
+REVIEW_INDEX_SQL = f"""CREATE VIRTUAL TABLE {REVIEW_INDEX_TABLE}
+    USING fts5(text, content='reviews_review',
+               content_rowid='id',
+               tokenize='unicode61 remove_diacritics 2')"""
+# Триггеры создаются с IF NOT EXISTS: create_triggers можно вызывать
+# при любом их состоянии.
+TITLE_TRIGGERS_SQL = (
+    f"""CREATE TRIGGER IF NOT EXISTS {TITLE_INDEX_TABLE}_insert
+        AFTER INSERT ON reviews_title BEGIN
+            INSERT INTO {TITLE_INDEX_TABLE}(rowid, name, description)
+            VALUES (new.id, new.name, new.description);
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TITLE_INDEX_TABLE}_delete
+        AFTER DELETE ON reviews_title BEGIN
+            INSERT INTO {TITLE_INDEX_TABLE}(
+                {TITLE_INDEX_TABLE}, rowid, name, description
+            ) VALUES ('delete', old.id, old.name, old.description);
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TITLE_INDEX_TABLE}_update
+        AFTER UPDATE OF name, description ON reviews_title BEGIN
+            INSERT INTO {TITLE_INDEX_TABLE}(
+                {TITLE_INDEX_TABLE}, rowid, name, description
+            ) VALUES ('delete', old.id, old.name, old.description);
+            INSERT INTO {TITLE_INDEX_TABLE}(rowid, name, description)
+            VALUES (new.id, new.name, new.description);
+        END""",
+)
+REVIEW_TRIGGERS_SQL = (
+    f"""CREATE TRIGGER IF NOT EXISTS {REVIEW_INDEX_TABLE}_insert
+        AFTER INSERT ON reviews_review BEGIN
+            INSERT INTO {REVIEW_INDEX_TABLE}(rowid, text)
+            VALUES (new.id, new.text);
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {REVIEW_INDEX_TABLE}_delete
+        AFTER DELETE ON reviews_review BEGIN
+            INSERT INTO {REVIEW_INDEX_TABLE}(
+                {REVIEW_INDEX_TABLE}, rowid, text
+            ) VALUES ('delete', old.id, old.text);
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {REVIEW_INDEX_TABLE}_update
+        AFTER UPDATE OF text ON reviews_review BEGIN
+            INSERT INTO {REVIEW_INDEX_TABLE}(
+                {REVIEW_INDEX_TABLE}, rowid, text
+            ) VALUES ('delete', old.id, old.text);
+            INSERT INTO {REVIEW_INDEX_TABLE}(rowid, text)
+            VALUES (new.id, new.text);
+        END""",
+)
+TRIGGERS_SQL = TITLE_TRIGGERS_SQL + REVIEW_TRIGGERS_SQL
+
+
+class SearchField(models.TextField):
+    """Скрытая колонка FTS5-таблицы с ее именем: условие MATCH по ней
+    ищет по всем индексируемым колонкам."""
+
+
+@SearchField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+def build_query(text):
+    """Запрос FTS5 из пользовательского текста: каждое слово ищется
+    как префикс, все слова должны встретиться. None, если слов нет."""
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def create_triggers():
+    """Создает недостающие триггеры индексов."""
+    with connection.cursor() as cursor:
+        for sql in TRIGGERS_SQL:
+            cursor.execute(sql)
+
+
+def drop_triggers():
+    with connection.cursor() as cursor:
+        for name in TRIGGER_NAMES:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+
+def rebuild_index(optimize=False):
+    """Перестраивает индексы по текущим данным таблиц.
+
+    Заодно создает триггеры, если их нет: например, если import_files
+    был прерван, пока они были сняты."""
+    create_triggers()
+    with connection.cursor() as cursor:
+        for index in INDEXES:
+            cursor.execute(f"INSERT INTO {index}({index}) VALUES ('rebuild')")
+            if optimize:
+                cursor.execute(
+                    f"INSERT INTO {index}({index}) VALUES ('optimize')"
+                )
+
+
+@contextmanager
+def triggers_suspended():
+    """Снимает триггеры индексов на время массовой загрузки, затем
+    восстанавливает их и перестраивает индексы.
+
+    Триггеры пишут в FTS5-таблицы из каждой транзакции загрузки,
+    и параллельные процессы import_files получают 'database is locked'.
+    Одно перестроение после загрузки к тому же дешевле обновления
+    индекса для каждой строки. Триггеры создаются заново по
+    TRIGGERS_SQL, а не по тому, что было в базе на входе: иначе после
+    аварийного завершения загрузки они не вернулись бы и при
+    следующем запуске."""
+    drop_triggers()
+    try:
+        yield
+    finally:
+        rebuild_index()
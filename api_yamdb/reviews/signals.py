@@ -0,0 +1,56 @@
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast, NullIf
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Comment, Review, Title
+
+
+def update_title_rating(title_id, score_delta, count_delta):
+    """Атомарно изменяет сумму и количество оценок произведения
+    и пересчитывает по ним рейтинг одним запросом UPDATE."""
+    rating_sum = F('rating_sum') + score_delta
+    rating_count = F('rating_count') + count_delta
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=rating_sum,
+        rating_count=rating_count,
+        rating=Cast(rating_sum, FloatField()) / NullIf(rating_count, 0),
+    )
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        update_title_rating(instance.title_id, instance.score, 1)
+    else:
+        old_score = getattr(instance, '_loaded_score', None)
+        if old_score is not None and old_score != instance.score:
+            update_title_rating(
+                instance.title_id, instance.score - old_score, 0
+            )
+    instance._loaded_score = instance.score
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    score = getattr(instance, '_loaded_score', None)
+    if score is None:
+        score = instance.score
+    update_title_rating(instance.title_id, -score, -1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Review.objects.filter(pk=instance.review_id).update(
+            comments_count=F('comments_count') + 1,
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    Review.objects.filter(pk=instance.review_id).update(
+        comments_count=F('comments_count') - 1,
+    )
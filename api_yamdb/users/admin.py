@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User
+from .models import OutgoingEmail, User
 
 
 class UserAdmin(admin.ModelAdmin):
@@ -14,3 +14,16 @@ class UserAdmin(admin.ModelAdmin):
 
 
 admin.site.register(User, UserAdmin)
+
+
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'recipient',
+        'subject',
+        'created_at',
+        'attempts',
+        'sent_at',
+    )
+
+
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
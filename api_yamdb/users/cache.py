@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import User
+
+VERSION_KEY = 'users:lru_version'
+
+UserInfo = namedtuple('UserInfo', ('username', 'role'))
+
+
+class UserCache:
+    """Ограниченный LRU-кэш id пользователя -> (username, role)
+    в памяти процесса.
+
+    При изменении пользователя увеличивается версия в кэше Django,
+    и каждый процесс, заметив новую версию, очищает свой кэш. Версия
+    видна всем процессам только в общем кэше (Redis, Memcached);
+    с кэшем в памяти процесса данные других процессов устаревают не
+    дольше чем на timeout секунд, после которых запись загружается
+    заново."""
+
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.users = OrderedDict()
+        self.version = None
+        self.lock = threading.Lock()
+
+    def check_version(self):
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            # Начальная версия берется из времени, чтобы после вытеснения
+            # ключа процессы не сочли свои кэши актуальными.
+            cache.add(VERSION_KEY, time.time_ns(), None)
+            version = cache.get(VERSION_KEY)
+        if version != self.version:
+            self.users.clear()
+            self.version = version
+
+    def get_many(self, user_ids):
+        """Возвращает словарь id -> UserInfo; отсутствующих в кэше
+        пользователей загружает одним запросом."""
+        result = {}
+        with self.lock:
+            self.check_version()
+            version = self.version
+            now = time.monotonic()
+            for user_id in user_ids:
+                entry = self.users.get(user_id)
+                if entry is None:
+                    continue
+                info, expires = entry
+                if expires <= now:
+                    del self.users[user_id]
+                    continue
+                self.users.move_to_end(user_id)
+                result[user_id] = info
+        missing = set(user_ids) - set(result) - {None}
+        if missing:
+            loaded = {
+                pk: UserInfo(username, role)
+                for pk, username, role in User.objects.filter(
+                    pk__in=missing
+                ).values_list('pk', 'username', 'role')
+            }
+            with self.lock:
+                # Пока шел запрос, кэш мог быть очищен по новой версии:
+                # тогда загруженные данные могут быть устаревшими.
+                if self.version == version:
+                    expires = time.monotonic() + self.timeout
+                    self.users.update(
+                        (pk, (info, expires)) for pk, info in loaded.items()
+                    )
+                    while len(self.users) > self.maxsize:
+                        self.users.popitem(last=False)
+            result.update(loaded)
+        return result
+
+    def get(self, user_id):
+        return self.get_many((user_id,)).get(user_id)
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.users.pop(user_id, None)
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, time.time_ns(), None)
+
+    def clear(self):
+        with self.lock:
+            self.users.clear()
+
+
+user_cache = UserCache(
+    settings.USER_CACHE_SIZE, settings.USER_CACHE_TIMEOUT
+)
@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.outbox import get_metrics, purge_emails, send_pending
+
+
+class Command(BaseCommand):
+
+    help = 'Sends queued emails in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+            help='Number of emails sent over one connection.',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling the queue instead of exiting when it is '
+                 'empty.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Seconds to wait between polls of an empty queue.',
+        )
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            help='Only print queue depth and send latency.',
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.print_metrics()
+            return
+        while True:
+            started = time.monotonic()
+            sent, failed = send_pending(options['batch_size'])
+            if sent or failed:
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'Sent {sent}, failed {failed} in {elapsed:.2f}s.'
+                )
+                continue
+            # Очередь пуста: самое время удалить старые письма.
+            purged = purge_emails()
+            if purged:
+                self.stdout.write(f'Purged {purged} old emails.')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.print_metrics()
+
+    def print_metrics(self):
+        for name, value in get_metrics().items():
+            self.stdout.write(f'{name}: {value}')
@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 17:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_outgoing_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='changed_at',
+            field=models.DateTimeField(editable=False, null=True, verbose_name='Дата изменения'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2 on 2026-10-18 18:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_changed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='claim',
+            field=models.CharField(blank=True, max_length=32, verbose_name='Метка отправителя'),
+        ),
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='locked_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Занято отправителем до'),
+        ),
+    ]
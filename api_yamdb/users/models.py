@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 
 class User(AbstractUser):
@@ -43,6 +44,11 @@ class User(AbstractUser):
         default=USER,
         max_length=15,
     )
+    changed_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        null=True,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Пользователь'
@@ -63,3 +69,62 @@ class User(AbstractUser):
     @property
     def is_user(self):
         return self.role == self.USER
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку командой send_emails."""
+
+    subject = models.CharField(
+        verbose_name='Тема',
+        max_length=255,
+    )
+    message = models.TextField(
+        verbose_name='Текст',
+    )
+    recipient = models.EmailField(
+        verbose_name='Получатель',
+        max_length=254,
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Дата и время постановки в очередь',
+        auto_now_add=True,
+    )
+    next_attempt_at = models.DateTimeField(
+        verbose_name='Дата и время следующей попытки',
+        default=timezone.now,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Количество попыток',
+        default=0,
+    )
+    sent_at = models.DateTimeField(
+        verbose_name='Дата и время отправки',
+        null=True,
+        blank=True,
+    )
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True,
+    )
+    locked_until = models.DateTimeField(
+        verbose_name='Занято отправителем до',
+        null=True,
+        blank=True,
+    )
+    claim = models.CharField(
+        verbose_name='Метка отправителя',
+        max_length=32,
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ('next_attempt_at',)
+        indexes = [
+            models.Index(fields=('sent_at', 'next_attempt_at'),
+                         name='outgoing_email_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
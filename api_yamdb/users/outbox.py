@@ -0,0 +1,164 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Avg, Count, F, Max, Min, Q
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+
+def enqueue_email(subject, message, recipient):
+    """Ставит письмо в очередь; отправляет его команда send_emails."""
+    return OutgoingEmail.objects.create(
+        subject=subject, message=message, recipient=recipient
+    )
+
+
+def pending_emails():
+    return OutgoingEmail.objects.filter(
+        sent_at__isnull=True,
+        attempts__lt=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+    )
+
+
+def claim_emails(batch_size):
+    """Занимает пачку писем, которым подошло время, на
+    EMAIL_OUTBOX_LOCK_TIMEOUT секунд и возвращает их.
+
+    Письма занимаются условным UPDATE: из одновременно работающих
+    отправителей каждое письмо достается только одному. Если
+    отправитель завершился, не отправив письма, после блокировки
+    их займет другой."""
+    now = timezone.now()
+    unlocked = Q(locked_until__isnull=True) | Q(locked_until__lt=now)
+    ids = list(
+        pending_emails().filter(
+            unlocked, next_attempt_at__lte=now
+        ).order_by('next_attempt_at').values_list('pk', flat=True)[
+            :batch_size
+        ]
+    )
+    if not ids:
+        return []
+    claim = uuid.uuid4().hex
+    OutgoingEmail.objects.filter(unlocked, pk__in=ids).update(
+        claim=claim,
+        locked_until=now + timedelta(
+            seconds=settings.EMAIL_OUTBOX_LOCK_TIMEOUT
+        ),
+    )
+    return list(OutgoingEmail.objects.filter(
+        pk__in=ids, claim=claim
+    ).order_by('next_attempt_at'))
+
+
+def send_pending(batch_size):
+    """Отправляет пачку писем, которым подошло время, через одно
+    соединение с почтовым сервером.
+
+    Письмо, которое не удалось отправить, получает следующую попытку
+    через EMAIL_OUTBOX_RETRY_DELAY секунд, удваивая паузу с каждой
+    попыткой. Текст отправленного письма с кодом подтверждения
+    стирается. Возвращает количество отправленных и неотправленных
+    писем."""
+    emails = claim_emails(batch_size)
+    if not emails:
+        return 0, 0
+    sent = 0
+    # Попытка засчитывается и тогда, когда не удалось открыть
+    # соединение: иначе пауза не растет и письмо не перестает
+    # отправляться после EMAIL_OUTBOX_MAX_ATTEMPTS попыток.
+    for email in emails:
+        email.attempts += 1
+    connection = get_connection()
+    try:
+        connection.open()
+        for email in emails:
+            sent += send_email(email, connection)
+    except Exception as error:
+        for email in emails:
+            if email.sent_at is None:
+                schedule_retry(email, error)
+    finally:
+        connection.close()
+    for email in emails:
+        email.locked_until = None
+        email.claim = ''
+    OutgoingEmail.objects.bulk_update(emails, (
+        'attempts', 'sent_at', 'next_attempt_at', 'message', 'last_error',
+        'locked_until', 'claim',
+    ))
+    return sent, len(emails) - sent
+
+
+def send_email(email, connection):
+    """Отправляет письмо через открытое соединение. Возвращает True,
+    если письмо отправлено, иначе назначает следующую попытку."""
+    try:
+        EmailMessage(
+            subject=email.subject,
+            body=email.message,
+            to=[email.recipient],
+            connection=connection,
+        ).send()
+    except Exception as error:
+        schedule_retry(email, error)
+        return False
+    email.sent_at = timezone.now()
+    email.message = ''
+    email.last_error = ''
+    return True
+
+
+def purge_emails():
+    """Удаляет отправленные и окончательно неотправленные письма старше
+    EMAIL_OUTBOX_RETENTION секунд. Возвращает число удаленных писем."""
+    deleted, _ = OutgoingEmail.objects.filter(
+        Q(sent_at__isnull=False)
+        | Q(attempts__gte=settings.EMAIL_OUTBOX_MAX_ATTEMPTS),
+        created_at__lt=timezone.now() - timedelta(
+            seconds=settings.EMAIL_OUTBOX_RETENTION
+        ),
+    ).delete()
+    return deleted
+
+
+def schedule_retry(email, error):
+    delay = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (email.attempts - 1)
+    email.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+    email.last_error = str(error)
+
+
+def get_metrics(window=timedelta(hours=1)):
+    """Размер очереди и задержка отправки писем за последний window."""
+    queue = pending_emails().aggregate(
+        depth=Count('pk'), oldest=Min('created_at')
+    )
+    now = timezone.now()
+    latency = OutgoingEmail.objects.filter(
+        sent_at__gte=now - window
+    ).aggregate(
+        average=Avg(F('sent_at') - F('created_at')),
+        maximum=Max(F('sent_at') - F('created_at')),
+    )
+    return {
+        'queue_depth': queue['depth'],
+        'failed': OutgoingEmail.objects.filter(
+            sent_at__isnull=True,
+            attempts__gte=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+        ).count(),
+        'oldest_pending_age': (
+            (now - queue['oldest']).total_seconds()
+            if queue['oldest'] else 0.0
+        ),
+        'send_latency_avg': (
+            latency['average'].total_seconds()
+            if latency['average'] else 0.0
+        ),
+        'send_latency_max': (
+            latency['maximum'].total_seconds()
+            if latency['maximum'] else 0.0
+        ),
+    }
@@ -0,0 +1,70 @@
+import pytest
+from django.core.management import CommandError, call_command
+
+from reviews.models import Review, Title
+from tests.utils import create_comments, create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08Counters:
+
+    def check_rating(self, title_id, expected_sum, expected_count):
+        title = Title.objects.get(pk=title_id)
+        assert (title.rating_sum, title.rating_count) == (
+            expected_sum, expected_count
+        ), (
+            'Проверьте, что сумма и количество оценок произведения '
+            'обновляются при изменении отзывов.'
+        )
+        expected_rating = (
+            expected_sum / expected_count if expected_count else None
+        )
+        assert title.rating == expected_rating, (
+            'Проверьте, что рейтинг произведения равен средней оценке.'
+        )
+
+    def test_01_rating_follows_reviews(self, admin_client, admin, user,
+                                       user_client, moderator,
+                                       moderator_client):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_id = titles[0]['id']
+        self.check_rating(title_id, 15, 3)
+
+        user_client.patch(
+            f'/api/v1/titles/{title_id}/reviews/{reviews[1]["id"]}/',
+            data={'score': 8}
+        )
+        self.check_rating(title_id, 18, 3)
+
+        moderator_client.delete(
+            f'/api/v1/titles/{title_id}/reviews/{reviews[2]["id"]}/'
+        )
+        self.check_rating(title_id, 13, 2)
+
+        user.delete()
+        self.check_rating(title_id, 5, 1)
+
+        admin_client.patch(
+            f'/api/v1/titles/{title_id}/', data={'name': 'Новое название'}
+        )
+        self.check_rating(title_id, 5, 1)
+
+    def test_02_recalculate_counters_command(self, admin_client, admin,
+                                            user, user_client):
+        author_map = {admin: admin_client, user: user_client}
+        _, titles = create_reviews(admin_client, author_map)
+        Title.objects.update(rating_sum=0, rating_count=0, rating=None)
+        Review.objects.update(comments_count=5)
+
+        with pytest.raises(CommandError):
+            call_command('recalculate_counters', check=True)
+
+        call_command('recalculate_counters')
+        self.check_rating(titles[0]['id'], 10, 2)
+        self.check_rating(titles[1]['id'], 0, 0)
+        assert not Review.objects.exclude(comments_count=0).exists()
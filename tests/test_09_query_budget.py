@@ -0,0 +1,141 @@
+import pytest
+
+from reviews.models import Category, Comment, Genre, Review, Title
+from tests.utils import assert_max_queries
+
+TITLES_LIST_MAX_QUERIES = 3
+TITLE_DETAIL_MAX_QUERIES = 2
+REVIEWS_LIST_MAX_QUERIES = 3
+REVIEWS_EXPANDED_LIST_MAX_QUERIES = 4
+# Проверка username и email, создание пользователя и письма в очереди.
+SIGNUP_MAX_QUERIES = 3
+
+
+def create_catalog(titles_number):
+    genres = [
+        Genre.objects.create(name=f'Жанр {idx}', slug=f'genre-{idx}')
+        for idx in range(3)
+    ]
+    categories = [
+        Category.objects.create(
+            name=f'Категория {idx}', slug=f'category-{idx}'
+        )
+        for idx in range(3)
+    ]
+    titles = []
+    for idx in range(titles_number):
+        title = Title.objects.create(
+            name=f'Произведение {idx}', year=2000,
+            category=categories[idx % len(categories)]
+        )
+        title.genre.set(genres[:idx % len(genres) + 1])
+        titles.append(title)
+    return titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09QueryBudget:
+
+    @pytest.mark.parametrize('titles_number', (1, 7, 20))
+    def test_01_titles_list(self, client, titles_number):
+        create_catalog(titles_number)
+        url = '/api/v1/titles/'
+        with assert_max_queries(url, TITLES_LIST_MAX_QUERIES):
+            response = client.get(url)
+        assert response.json()['count'] == titles_number
+
+    def test_02_title_detail(self, client):
+        titles = create_catalog(3)
+        url = f'/api/v1/titles/{titles[0].id}/'
+        with assert_max_queries(url, TITLE_DETAIL_MAX_QUERIES):
+            response = client.get(url)
+        assert response.json()['category'] == {
+            'name': 'Категория 0', 'slug': 'category-0'
+        }
+
+    @pytest.mark.parametrize('expand, max_queries', (
+        ('', REVIEWS_LIST_MAX_QUERIES),
+        ('comments', REVIEWS_EXPANDED_LIST_MAX_QUERIES),
+    ))
+    def test_03_reviews_list(self, client, django_user_model, expand,
+                             max_queries):
+        title = create_catalog(1)[0]
+        for idx in range(10):
+            author = django_user_model.objects.create_user(
+                username=f'author{idx}', email=f'author{idx}@yamdb.fake'
+            )
+            commenter = django_user_model.objects.create_user(
+                username=f'commenter{idx}',
+                email=f'commenter{idx}@yamdb.fake'
+            )
+            review = Review.objects.create(
+                title=title, author=author, text=f'Отзыв {idx}', score=5
+            )
+            # Авторы комментариев отличаются от авторов отзывов: все они
+            # должны загружаться одним запросом на страницу.
+            for number in range(idx):
+                Comment.objects.create(
+                    review=review, author=commenter,
+                    text=f'Комментарий {number}'
+                )
+        url = f'/api/v1/titles/{title.id}/reviews/?expand={expand}'
+        with assert_max_queries(url, max_queries):
+            response = client.get(url)
+        # Авторы уже в кэше пользователей: запроса к ним больше нет.
+        with assert_max_queries(url, max_queries - 1):
+            client.get(url)
+        for review in response.json()['results']:
+            if expand:
+                assert len(review['comments']) == min(
+                    review['comments_count'], 3
+                )
+            else:
+                assert 'comments' not in review
+
+    def test_04_expanded_comments_latest(self, client, user, admin):
+        title = create_catalog(1)[0]
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=5
+        )
+        other = Review.objects.create(
+            title=title, author=admin, text='Другой отзыв', score=7
+        )
+        comments = [
+            Comment.objects.create(
+                review=review, author=admin, text=f'Комментарий {idx}'
+            )
+            for idx in range(5)
+        ]
+        Comment.objects.create(review=other, author=user, text='Другой')
+        latest = [comment.id for comment in comments[:-4:-1]]
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        results = client.get(url, {'expand': 'comments'}).json()['results']
+        expanded = {item['id']: item['comments'] for item in results}
+        assert [comment['id'] for comment in expanded[review.id]] \
+            == latest, (
+                'Проверьте, что к отзыву добавляются последние комментарии, '
+                'новые первыми.'
+            )
+        assert [comment['text'] for comment in expanded[other.id]] \
+            == ['Другой']
+        response = client.get(f'{url}{review.id}/', {'expand': 'comments'})
+        assert [comment['id'] for comment in response.json()['comments']] \
+            == latest
+
+    def test_05_signup(self, client, django_user_model):
+        url = '/api/v1/auth/signup/'
+        data = {'username': 'new_user', 'email': 'new_user@yamdb.fake'}
+        with assert_max_queries(url, SIGNUP_MAX_QUERIES):
+            response = client.post(url, data=data)
+        assert response.status_code == 200
+        assert django_user_model.objects.filter(**data).exists()
+
+        with assert_max_queries(url, 1):
+            response = client.post(url, data=data)
+        assert response.status_code == 200
+
+        conflict = {'username': 'new_user', 'email': 'other@yamdb.fake'}
+        with assert_max_queries(url, 1):
+            response = client.post(url, data=conflict)
+        assert response.status_code == 400
+        assert 'username' in response.json()
@@ -0,0 +1,66 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10Pagination:
+
+    def test_01_reviews_cursor_pagination(self, client, django_user_model):
+        title = Title.objects.create(name='Произведение', year=2000)
+        for idx in range(16):
+            author = django_user_model.objects.create_user(
+                username=f'author{idx}', email=f'author{idx}@yamdb.fake'
+            )
+            Review.objects.create(
+                title=title, author=author, text=f'Отзыв {idx}', score=5
+            )
+        url = f'/api/v1/titles/{title.id}/reviews/?pagination=cursor'
+
+        received = []
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url)
+            assert not any(
+                'COUNT(' in query['sql'].upper()
+                for query in context.captured_queries
+            ), (
+                'Проверьте, что курсорная пагинация не выполняет COUNT.'
+            )
+            data = response.json()
+            assert 'count' not in data
+            received.extend(review['id'] for review in data['results'])
+            url = data['next']
+
+        expected = list(
+            Review.objects.order_by('-pub_date', '-id').values_list(
+                'id', flat=True
+            )
+        )
+        assert received == expected, (
+            'Проверьте, что курсорная пагинация возвращает все отзывы '
+            'по одному разу в порядке убывания даты публикации.'
+        )
+
+    def test_02_titles_approximate_count(self, client, settings):
+        settings.PAGINATION_EXACT_COUNT_LIMIT = 2
+        cache.clear()
+        for idx in range(3):
+            Title.objects.create(name=f'Произведение {idx}', year=2000)
+
+        response = client.get('/api/v1/titles/')
+        assert response.json()['count'] == 3
+
+        Title.objects.create(name='Новое произведение', year=2000)
+        response = client.get('/api/v1/titles/')
+        assert response.json()['count'] == 3, (
+            'Проверьте, что количество произведений в большой коллекции '
+            'берется из кэша.'
+        )
+
+        cache.clear()
+        response = client.get('/api/v1/titles/')
+        assert response.json()['count'] == 4
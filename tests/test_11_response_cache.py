@@ -0,0 +1,51 @@
+import pytest
+
+from api.cache import stats
+from reviews.models import Category, Genre, Review, Title
+from tests.utils import assert_max_queries
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11ResponseCache:
+
+    def test_01_titles_cached_until_change(self, client, user):
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        category = Category.objects.create(name='Фильм', slug='films')
+        title = Title.objects.create(
+            name='Произведение', year=2000, category=category
+        )
+        url = '/api/v1/titles/'
+        stats.reset()
+
+        client.get(url)
+        with assert_max_queries(url, 0):
+            response = client.get(url)
+        assert (stats.hits, stats.misses) == (1, 1), (
+            'Проверьте, что повторный GET-запрос к `/api/v1/titles/` '
+            'обслуживается из кэша.'
+        )
+        assert response.json()['results'][0]['genre'] == []
+
+        title.genre.add(genre)
+        response = client.get(url)
+        assert response.json()['results'][0]['genre'] == [
+            {'name': 'Драма', 'slug': 'drama'}
+        ], (
+            'Проверьте, что изменение жанров произведения сбрасывает кэш.'
+        )
+
+        Review.objects.create(title=title, author=user, text='Отзыв', score=7)
+        response = client.get(f'{url}{title.id}/')
+        assert response.json()['rating'] == 7, (
+            'Проверьте, что новый отзыв сбрасывает кэш произведений.'
+        )
+
+    def test_02_query_params_in_key(self, client):
+        Category.objects.create(name='Фильм', slug='films')
+        Category.objects.create(name='Книги', slug='books')
+        response = client.get('/api/v1/categories/')
+        assert response.json()['count'] == 2
+        response = client.get('/api/v1/categories/?search=Книги')
+        assert response.json()['count'] == 1, (
+            'Проверьте, что параметры запроса входят в ключ кэша.'
+        )
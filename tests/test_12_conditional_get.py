@@ -0,0 +1,152 @@
+from http import HTTPStatus
+
+import time
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+
+from api.cache import MODIFIED_KEY
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+from tests.utils import assert_max_queries
+
+
+def set_modified_in_past(*models):
+    # Last-Modified имеет точность в секунду: сдвигаем время изменения
+    # в прошлое, чтобы новое изменение в той же секунде было заметно.
+    # Закэшированные ответы хранят прежний Last-Modified.
+    cache.clear()
+    for model in models:
+        cache.set(MODIFIED_KEY.format(model._meta.label_lower),
+                  time.time() - 60, None)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12ConditionalGet:
+
+    def test_01_reviews_etag(self, client, user, admin):
+        title = Title.objects.create(name='Произведение', year=2000)
+        Review.objects.create(title=title, author=user, text='Отзыв', score=5)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+
+        response = client.get(url)
+        etag = response['ETag']
+        assert etag and response.has_header('Last-Modified'), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовки ETag и Last-Modified.'
+        )
+
+        with assert_max_queries(url, 0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с совпадающим '
+            'If-None-Match возвращает ответ со статусом 304.'
+        )
+        assert not response.content
+
+        last_modified = client.get(url)['Last-Modified']
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        Review.objects.create(
+            title=title, author=admin, text='Еще отзыв', score=7
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после добавления отзыва ETag списка меняется.'
+        )
+
+    def test_02_cached_title_etag(self, client):
+        title = Title.objects.create(name='Произведение', year=2000)
+        url = f'/api/v1/titles/{title.id}/'
+        etag = client.get(url)['ETag']
+
+        with assert_max_queries(url, 0):
+            response = client.get(url)
+        assert response['ETag'] == etag, (
+            'Проверьте, что ответ из кэша содержит тот же ETag.'
+        )
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        title = Title.objects.get(pk=title.id)
+        title.description = 'Новое описание'
+        title.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['description'] == 'Новое описание'
+
+    def test_03_if_modified_since_related_changes(self, client, user):
+        category = Category.objects.create(name='Фильм', slug='film')
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        title = Title.objects.create(
+            name='Произведение', year=2000, category=category
+        )
+        title.genre.add(genre)
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=5
+        )
+        changes = (
+            ('/api/v1/titles/', lambda: Category.objects.filter(
+                pk=category.pk).first().save()),
+            ('/api/v1/titles/', lambda: Genre.objects.filter(
+                pk=genre.pk).first().save()),
+            (f'/api/v1/titles/{title.id}/reviews/', review.delete),
+        )
+        for url, change in changes:
+            set_modified_in_past(Title, Category, Genre, Review, Comment, User)
+            last_modified = client.get(url)['Last-Modified']
+            response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+            assert response.status_code == HTTPStatus.NOT_MODIFIED
+            change()
+            response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что после изменения связанных объектов или '
+                f'удаления GET-запрос к `{url}` с If-Modified-Since '
+                'не возвращает 304.'
+            )
+
+    def test_04_etag_nested_objects(self, client, user):
+        title = Title.objects.create(name='Произведение', year=2000)
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=5
+        )
+        Comment.objects.create(review=review, author=user, text='Коммент')
+        changes = (
+            (f'/api/v1/titles/{title.id}/reviews/',
+             lambda: Title.objects.get(pk=title.pk).save()),
+            (f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+             lambda: Review.objects.get(pk=review.pk).save()),
+        )
+        for url, change in changes:
+            etag = client.get(url)['ETag']
+            change()
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что ETag ответа на GET-запрос к `{url}` '
+                'меняется при изменении выводимых в нем связанных объектов.'
+            )
+
+    def test_05_etag_after_bulk_commands(self, client):
+        call_command('import_files')
+        review = Review.objects.filter(comments__isnull=False).first()
+        url = (f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+               'comments/')
+        review.comments.all().delete()
+        etag = client.get(url)['ETag']
+        call_command('import_files')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что import_files меняет ETag списка комментариев.'
+        )
+
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        Review.objects.filter(pk=review.pk).update(comments_count=0)
+        etag = client.get(url)['ETag']
+        call_command('recalculate_counters')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что recalculate_counters меняет ETag списка отзывов.'
+        )
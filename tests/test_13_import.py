@@ -0,0 +1,110 @@
+import csv
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.management.commands.import_files import (DATA_DIR, LIST_MODEL,
+                                                      get_dependencies,
+                                                      read_rows)
+from reviews.models import Comment, ImportCheckpoint, Review, Title
+
+IMPORT_MAX_QUERIES = 60
+
+
+def count_rows(filename):
+    with open(DATA_DIR / filename, 'r', encoding='utf-8') as csvfile:
+        return sum(1 for _ in csv.DictReader(csvfile))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13Import:
+
+    def test_00_import_dependencies(self):
+        expected = {
+            'User': set(),
+            'Genre': set(),
+            'Category': set(),
+            'Title': {'Category'},
+            'GenreTitle': {'Title', 'Genre'},
+            'Review': {'Title', 'User'},
+            'Comment': {'Review', 'User'},
+        }
+        for name, dependencies in expected.items():
+            assert get_dependencies(name) == dependencies, (
+                f'Проверьте зависимости этапа {name} при параллельной загрузке.'
+            )
+
+    def test_01_import_files(self):
+        with CaptureQueriesContext(connection) as context:
+            call_command('import_files', batch_size=50)
+        assert len(context.captured_queries) <= IMPORT_MAX_QUERIES, (
+            'Проверьте, что команда import_files сохраняет строки пачками, '
+            'а не выполняет запросы на каждую строку.'
+        )
+        for name, params in LIST_MODEL.items():
+            assert params['model'].objects.count() == count_rows(
+                params['file']
+            ), f'Проверьте, что команда import_files загружает {name}.'
+
+        call_command('import_files')
+        assert Title.objects.count() == count_rows('titles.csv'), (
+            'Проверьте, что повторный запуск import_files не создает дубли.'
+        )
+        call_command('recalculate_counters', check=True)
+
+    def test_02_streaming_import_resume(self):
+        call_command('import_files', stream=True, batch_size=10)
+        assert not ImportCheckpoint.objects.filter(completed=False).exists()
+
+        rows = read_rows(DATA_DIR / 'review.csv')
+        for _ in range(30):
+            row, offset = next(rows)
+        rows.close()
+        Review.objects.filter(pk__gt=int(row['id'])).delete()
+        ImportCheckpoint.objects.filter(file='review.csv').update(
+            offset=offset, last_id=row['id'], completed=False
+        )
+
+        call_command('import_files', resume=True, batch_size=10)
+        assert Review.objects.count() == count_rows('review.csv'), (
+            'Проверьте, что import_files --resume продолжает загрузку '
+            'с сохраненной контрольной точки.'
+        )
+        call_command('recalculate_counters', check=True)
+
+    def test_03_parallel_import_resume(self):
+        # Пачки по 10 строк: больше одной пачки на этап, которые
+        # сохраняются разными процессами.
+        call_command('import_files', workers=2, batch_size=10)
+        for name, params in LIST_MODEL.items():
+            assert params['model'].objects.count() == count_rows(
+                params['file']
+            ), f'Проверьте, что import_files --workers загружает {name}.'
+            assert ImportCheckpoint.objects.filter(
+                file=params['file'], completed=True
+            ).exists(), (
+                f'Проверьте, что после параллельной загрузки {name} '
+                'сохраняется контрольная точка.'
+            )
+        call_command('recalculate_counters', check=True)
+
+        Comment.objects.all().delete()
+        Review.objects.filter(pk__gt=10).delete()
+        ImportCheckpoint.objects.filter(
+            file__in=('review.csv', 'comments.csv')
+        ).update(completed=False)
+        Title.objects.all().update(name='Изменено')
+
+        call_command('import_files', workers=2, batch_size=10, resume=True)
+        assert Review.objects.count() == count_rows('review.csv')
+        assert Comment.objects.count() == count_rows('comments.csv'), (
+            'Проверьте, что import_files --workers --resume загружает '
+            'незавершенные файлы.'
+        )
+        assert not Title.objects.exclude(name='Изменено').exists(), (
+            'Проверьте, что import_files --workers --resume пропускает '
+            'загруженные файлы.'
+        )
+        call_command('recalculate_counters', check=True)
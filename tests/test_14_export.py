@@ -0,0 +1,63 @@
+import csv
+import gzip
+import json
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from reviews.management.commands import import_files
+from reviews.management.commands.import_files import LIST_MODEL
+from reviews.models import Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14Export:
+
+    def test_01_export_csv(self, tmp_path):
+        call_command('import_files')
+        call_command('export_data', output_dir=tmp_path, include_users=True)
+        for params in LIST_MODEL.values():
+            path = tmp_path / params['file']
+            with open(path, 'r', encoding='utf-8') as csvfile:
+                rows = list(csv.DictReader(csvfile))
+            assert len(rows) == params['model'].objects.count(), (
+                f'Проверьте, что export_data выгружает все строки в {path}.'
+            )
+            assert set(rows[0]) >= set(params['fields'].values())
+
+    def test_02_export_ndjson_gzip(self, tmp_path):
+        call_command('import_files')
+        call_command(
+            'export_data', output_dir=tmp_path, format='ndjson', gzip=True,
+            models=['Review'], chunk_size=10
+        )
+        with gzip.open(tmp_path / 'review.ndjson.gz', 'rt',
+                       encoding='utf-8') as stream:
+            rows = [json.loads(line) for line in stream]
+        assert len(rows) == LIST_MODEL['Review']['model'].objects.count()
+        assert {'id', 'title_id', 'author', 'score', 'pub_date'} <= set(
+            rows[0]
+        )
+
+    def test_03_users_opt_in(self, tmp_path):
+        call_command('import_files')
+        call_command('export_data', output_dir=tmp_path)
+        assert not (tmp_path / LIST_MODEL['User']['file']).exists(), (
+            'Проверьте, что пользователи по умолчанию не выгружаются.'
+        )
+        assert (tmp_path / LIST_MODEL['Title']['file']).exists()
+        with pytest.raises(CommandError):
+            call_command('export_data', output_dir=tmp_path, models=['User'])
+
+    def test_04_round_trip_description(self, tmp_path, monkeypatch):
+        call_command('import_files')
+        Title.objects.filter(pk=1).update(description='Описание')
+        call_command('export_data', output_dir=tmp_path, include_users=True)
+        Title.objects.all().delete()
+        monkeypatch.setattr(import_files, 'DATA_DIR', tmp_path)
+        call_command('import_files')
+        assert Title.objects.get(pk=1).description == 'Описание', (
+            'Проверьте, что описание произведения выгружается '
+            'и загружается обратно.'
+        )
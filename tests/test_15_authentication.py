@@ -0,0 +1,95 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from api.authentication import USER_CHANGED_KEY, get_access_token
+from reviews.models import Title
+from tests.utils import assert_max_queries
+
+
+def get_client(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {get_access_token(user)}'
+    )
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15Authentication:
+
+    def test_01_no_user_query(self, admin):
+        client = get_client(admin)
+        url = '/api/v1/users/'
+        with assert_max_queries(url, 2) as context:
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert not any(
+            '"users_user"."id" =' in query['sql']
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что пользователь с токеном из `/api/v1/auth/token/` '
+            'не загружается из базы на каждый запрос.'
+        )
+
+    def test_02_role_change_applies_to_issued_token(self, admin):
+        client = get_client(admin)
+        url = '/api/v1/users/'
+        assert client.get(url).status_code == HTTPStatus.OK
+
+        admin.role = admin.USER
+        admin.save()
+        assert client.get(url).status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что после смены роли выпущенный ранее токен '
+            'не дает прав администратора.'
+        )
+
+    def test_03_role_change_without_cache_marker(self, admin):
+        client = get_client(admin)
+        url = '/api/v1/users/'
+        assert client.get(url).status_code == HTTPStatus.OK
+
+        admin.role = admin.USER
+        admin.save()
+        # Так выглядит другой процесс или кэш, из которого вытеснена метка.
+        cache.clear()
+        assert client.get(url).status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что время изменения пользователя хранится в базе '
+            'и выпущенный ранее токен не дает прав без метки в кэше.'
+        )
+
+    def test_04_deleted_user_cannot_write(self, user):
+        title = Title.objects.create(name='Произведение', year=2000)
+        client = get_client(user)
+        user_id = user.id
+        user.delete()
+        # Другой процесс еще не знает об удалении.
+        cache.set(USER_CHANGED_KEY.format(user_id), 0)
+        response = client.post(
+            f'/api/v1/titles/{title.id}/reviews/',
+            data={'text': 'Отзыв', 'score': 6}
+        )
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что запрос удаленного пользователя отклоняется '
+            'с кодом 401.'
+        )
+
+    def test_05_write_with_token_user(self, user):
+        title = Title.objects.create(name='Произведение', year=2000)
+        client = get_client(user)
+        response = client.post(
+            f'/api/v1/titles/{title.id}/reviews/',
+            data={'text': 'Отзыв', 'score': 6}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['author'] == user.username
+        review_id = response.json()['id']
+        response = client.patch(
+            f'/api/v1/titles/{title.id}/reviews/{review_id}/',
+            data={'score': 7}
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что автор может изменить свой отзыв.'
+        )
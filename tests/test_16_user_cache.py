@@ -0,0 +1,55 @@
+import time
+
+import pytest
+
+from reviews.models import Review, Title
+from users.cache import UserCache
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16UserCache:
+
+    def test_01_author_renamed(self, client, user):
+        title = Title.objects.create(name='Произведение', year=2000)
+        Review.objects.create(title=title, author=user, text='Отзыв', score=5)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        assert client.get(url).json()['results'][0]['author'] == 'TestUser'
+
+        user.username = 'RenamedUser'
+        user.save()
+        assert client.get(url).json()['results'][0]['author'] == (
+            'RenamedUser'
+        ), (
+            'Проверьте, что кэш пользователей сбрасывается при изменении '
+            'пользователя.'
+        )
+
+    def test_02_lru_bounded(self, django_user_model):
+        users = [
+            django_user_model.objects.create_user(
+                username=f'user{idx}', email=f'user{idx}@yamdb.fake'
+            )
+            for idx in range(5)
+        ]
+        cache = UserCache(maxsize=3, timeout=60)
+        infos = cache.get_many([user.pk for user in users])
+        assert infos[users[0].pk].username == 'user0'
+        assert len(cache.users) == 3
+
+    def test_03_entries_expire(self, django_user_model, monkeypatch):
+        user = django_user_model.objects.create_user(
+            username='user', email='user@yamdb.fake'
+        )
+        cache = UserCache(maxsize=10, timeout=60)
+        assert cache.get(user.pk).username == 'user'
+        # Переименование в другом процессе, до которого не дошла версия.
+        django_user_model.objects.filter(pk=user.pk).update(
+            username='renamed'
+        )
+        assert cache.get(user.pk).username == 'user'
+        now = time.monotonic()
+        monkeypatch.setattr(time, 'monotonic', lambda: now + 61)
+        assert cache.get(user.pk).username == 'renamed', (
+            'Проверьте, что записи кэша пользователей устаревают через '
+            'USER_CACHE_TIMEOUT секунд.'
+        )
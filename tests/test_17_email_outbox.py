@@ -0,0 +1,126 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.core.mail import EmailMessage
+from django.core.mail.backends.base import BaseEmailBackend
+from django.utils import timezone
+
+from users.models import OutgoingEmail
+from users.outbox import (claim_emails, enqueue_email, get_metrics,
+                          send_pending)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17EmailOutbox:
+
+    def test_01_signup_only_enqueues(self, client):
+        outbox_before_count = len(mail.outbox)
+        client.post(
+            '/api/v1/auth/signup/',
+            data={'email': 'valid@yamdb.fake', 'username': 'valid_username'}
+        )
+        assert len(mail.outbox) == outbox_before_count, (
+            'Проверьте, что регистрация только ставит письмо в очередь.'
+        )
+        assert get_metrics()['queue_depth'] == 1
+
+        assert send_pending(10) == (1, 0)
+        assert mail.outbox[-1].to == ['valid@yamdb.fake']
+        metrics = get_metrics()
+        assert metrics['queue_depth'] == 0
+        assert metrics['send_latency_max'] >= 0
+
+    def test_02_retry_with_backoff(self, monkeypatch, settings):
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 2
+        email = enqueue_email('Тема', 'Текст', 'user@yamdb.fake')
+
+        def fail(self, fail_silently=False):
+            raise OSError('connection refused')
+
+        monkeypatch.setattr(EmailMessage, 'send', fail)
+        assert send_pending(10) == (0, 1)
+        email.refresh_from_db()
+        assert email.attempts == 1
+        assert email.last_error == 'connection refused'
+        assert email.next_attempt_at > timezone.now(), (
+            'Проверьте, что повторная отправка откладывается.'
+        )
+        assert send_pending(10) == (0, 0)
+
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        assert send_pending(10) == (0, 1)
+        assert get_metrics()['failed'] == 1
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        assert send_pending(10) == (0, 0), (
+            'Проверьте, что после EMAIL_OUTBOX_MAX_ATTEMPTS попыток '
+            'письмо больше не отправляется.'
+        )
+
+    def test_03_retry_when_connection_fails(self, monkeypatch, settings):
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 2
+        settings.EMAIL_OUTBOX_RETRY_DELAY = 30
+        email = enqueue_email('Тема', 'Текст', 'user@yamdb.fake')
+
+        def fail(self):
+            raise OSError('connection refused')
+
+        monkeypatch.setattr(BaseEmailBackend, 'open', fail)
+        delays = []
+        for attempt in range(1, 3):
+            started = timezone.now()
+            assert send_pending(10) == (0, 1)
+            email.refresh_from_db()
+            assert email.attempts == attempt, (
+                'Проверьте, что попытка засчитывается, если не удалось '
+                'открыть соединение с почтовым сервером.'
+            )
+            assert email.last_error == 'connection refused'
+            delays.append((email.next_attempt_at - started).total_seconds())
+            OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        assert delays[1] > delays[0] + 20, (
+            'Проверьте, что пауза между попытками растет.'
+        )
+        assert send_pending(10) == (0, 0)
+        assert get_metrics()['failed'] == 1
+
+    def test_04_claimed_emails_not_sent_twice(self):
+        enqueue_email('Тема', 'Текст', 'user@yamdb.fake')
+        outbox_before_count = len(mail.outbox)
+        assert len(claim_emails(10)) == 1
+        assert send_pending(10) == (0, 0), (
+            'Проверьте, что письма, занятые другим отправителем, '
+            'не отправляются повторно.'
+        )
+        assert claim_emails(10) == []
+
+        OutgoingEmail.objects.update(
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        assert send_pending(10) == (1, 0), (
+            'Проверьте, что письма завершившегося отправителя '
+            'отправляются после блокировки.'
+        )
+        assert len(mail.outbox) == outbox_before_count + 1
+
+    def test_05_sent_emails_purged(self, settings):
+        email = enqueue_email('Тема', 'Код: 123', 'user@yamdb.fake')
+        assert send_pending(10) == (1, 0)
+        email.refresh_from_db()
+        assert email.message == '', (
+            'Проверьте, что текст отправленного письма стирается.'
+        )
+        pending = enqueue_email('Тема', 'Текст', 'other@yamdb.fake')
+        OutgoingEmail.objects.update(
+            created_at=timezone.now() - timedelta(
+                seconds=settings.EMAIL_OUTBOX_RETENTION + 1
+            )
+        )
+        OutgoingEmail.objects.filter(pk=pending.pk).update(
+            next_attempt_at=timezone.now() + timedelta(hours=1)
+        )
+        call_command('send_emails')
+        assert list(OutgoingEmail.objects.values_list('pk', flat=True)) == [
+            pending.pk
+        ], 'Проверьте, что старые отправленные письма удаляются.'
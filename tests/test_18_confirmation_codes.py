@@ -0,0 +1,80 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import OutgoingEmail
+from tests.utils import assert_max_queries
+
+URL_SIGNUP = '/api/v1/auth/signup/'
+URL_TOKEN = '/api/v1/auth/token/'
+
+
+def signup(client, username='valid_username'):
+    client.post(URL_SIGNUP, data={
+        'username': username, 'email': f'{username}@yamdb.fake'
+    })
+    message = OutgoingEmail.objects.get(recipient=f'{username}@yamdb.fake')
+    return message.message.split()[-1]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18ConfirmationCodes:
+
+    def test_01_token_without_queries(self, client):
+        code = signup(client)
+        with assert_max_queries(URL_TOKEN, 0):
+            response = client.post(URL_TOKEN, data={
+                'username': 'valid_username', 'confirmation_code': code
+            })
+        assert response.status_code == HTTPStatus.OK
+        token = AccessToken(response.json()['token'])
+        assert token['username'] == 'valid_username'
+        assert token['role'] == 'user'
+
+    def test_02_code_is_single_use(self, client):
+        code = signup(client)
+        data = {'username': 'valid_username', 'confirmation_code': code}
+        assert client.post(URL_TOKEN, data=data).status_code == HTTPStatus.OK
+        assert client.post(URL_TOKEN, data=data).status_code == (
+            HTTPStatus.BAD_REQUEST
+        ), 'Проверьте, что код подтверждения можно использовать один раз.'
+
+    def test_03_code_of_other_user(self, client):
+        code = signup(client)
+        signup(client, 'other_username')
+        response = client.post(URL_TOKEN, data={
+            'username': 'other_username', 'confirmation_code': code
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_04_expired_code(self, client, settings):
+        code = signup(client)
+        settings.CONFIRMATION_CODE_TIMEOUT = -1
+        response = client.post(URL_TOKEN, data={
+            'username': 'valid_username', 'confirmation_code': code
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_05_without_cache(self, client):
+        code = signup(client)
+        cache.clear()
+        with assert_max_queries(URL_TOKEN, 1):
+            response = client.post(URL_TOKEN, data={
+                'username': 'valid_username', 'confirmation_code': code
+            })
+        assert response.status_code == HTTPStatus.OK
+
+    def test_06_role_change_invalidates_code(self, client,
+                                             django_user_model):
+        code = signup(client)
+        user = django_user_model.objects.get(username='valid_username')
+        user.role = user.MODERATOR
+        user.save()
+        response = client.post(URL_TOKEN, data={
+            'username': 'valid_username', 'confirmation_code': code
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что код, выпущенный до смены роли, не подходит.'
+        )
@@ -0,0 +1,129 @@
+from http import HTTPStatus
+from types import SimpleNamespace
+
+import pytest
+
+from api import throttling
+from reviews.models import Title
+
+RATES = {
+    'signup': {'anon': '2/hour'},
+    'token': {'anon': '2/hour'},
+    'review': {'user': '1/hour', 'moderator': '2/hour'},
+    'comment': {'user': '1/hour'},
+}
+
+
+@pytest.fixture
+def rates(settings):
+    settings.THROTTLE_RATES = RATES
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19Throttling:
+
+    def test_01_signup(self, client, rates):
+        url = '/api/v1/auth/signup/'
+        for idx in range(2):
+            response = client.post(url, data={
+                'username': f'user{idx}', 'email': f'user{idx}@yamdb.fake'
+            })
+            assert response.status_code == HTTPStatus.OK
+        response = client.post(url, data={
+            'username': 'user3', 'email': 'user3@yamdb.fake'
+        })
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            f'Проверьте, что частота запросов к `{url}` ограничена.'
+        )
+        assert int(response['Retry-After']) > 0
+
+    def test_02_review_create_per_role(self, rates, user_client,
+                                       moderator_client, admin_client):
+        url = '/api/v1/titles/{}/reviews/'
+        titles = [
+            Title.objects.create(name=f'Произведение {idx}', year=2000)
+            for idx in range(4)
+        ]
+        data = {'text': 'Отзыв', 'score': 5}
+        assert user_client.post(
+            url.format(titles[0].id), data=data
+        ).status_code == HTTPStatus.CREATED
+        assert user_client.post(
+            url.format(titles[1].id), data=data
+        ).status_code == HTTPStatus.TOO_MANY_REQUESTS
+        assert user_client.get(
+            url.format(titles[1].id)
+        ).status_code == HTTPStatus.OK, (
+            'Проверьте, что ограничено только создание отзывов.'
+        )
+
+        for title in titles[:2]:
+            assert moderator_client.post(
+                url.format(title.id), data=data
+            ).status_code == HTTPStatus.CREATED
+        assert moderator_client.post(
+            url.format(titles[2].id), data=data
+        ).status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+        for title in titles:
+            assert admin_client.post(
+                url.format(title.id), data=data
+            ).status_code == HTTPStatus.CREATED, (
+                'Проверьте, что администратор не ограничивается.'
+            )
+
+    def test_03_sliding_window(self, client, rates, monkeypatch):
+        url = '/api/v1/auth/token/'
+        data = {'username': 'unexisting_user', 'confirmation_code': '1'}
+        clock = SimpleNamespace(now=3600 * 1000 + 3000)
+        monkeypatch.setattr(
+            throttling, 'time', SimpleNamespace(time=lambda: clock.now)
+        )
+
+        def post():
+            return client.post(url, data=data).status_code
+
+        assert [post(), post(), post()] == [
+            HTTPStatus.NOT_FOUND, HTTPStatus.NOT_FOUND,
+            HTTPStatus.TOO_MANY_REQUESTS
+        ]
+        # Начало следующего окна: два запроса предыдущего учитываются
+        # почти полностью.
+        clock.now += 700
+        assert [post(), post()] == [
+            HTTPStatus.NOT_FOUND, HTTPStatus.TOO_MANY_REQUESTS
+        ]
+        # Прошло 60% окна: от предыдущего окна учитываются 40%.
+        clock.now += 3600 * 0.6 - 100
+        assert post() == HTTPStatus.NOT_FOUND
+
+    def test_04_token_authenticated(self, rates, user_client, admin_client):
+        url = '/api/v1/auth/token/'
+        data = {'username': 'unexisting_user', 'confirmation_code': '1'}
+        statuses = [
+            user_client.post(url, data=data).status_code,
+            admin_client.post(url, data=data).status_code,
+            admin_client.post(url, data=data).status_code,
+        ]
+        assert statuses == [
+            HTTPStatus.NOT_FOUND, HTTPStatus.NOT_FOUND,
+            HTTPStatus.TOO_MANY_REQUESTS
+        ], (
+            f'Проверьте, что запросы к `{url}` ограничиваются по IP-адресу '
+            'и для пользователей с токеном, в том числе администраторов.'
+        )
+
+    def test_05_forwarded_for_ignored(self, client, rates):
+        url = '/api/v1/auth/signup/'
+        statuses = [
+            client.post(url, data={
+                'username': f'user{idx}', 'email': f'user{idx}@yamdb.fake'
+            }, HTTP_X_FORWARDED_FOR=f'10.0.0.{idx}').status_code
+            for idx in range(3)
+        ]
+        assert statuses == [
+            HTTPStatus.OK, HTTPStatus.OK, HTTPStatus.TOO_MANY_REQUESTS
+        ], (
+            f'Проверьте, что запросы к `{url}` считаются по адресу '
+            'соединения, а не по заголовку X-Forwarded-For.'
+        )
@@ -0,0 +1,113 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from reviews.models import Review, Title
+from reviews.search import drop_triggers, triggers_suspended
+
+URL_TITLES = '/api/v1/titles/'
+URL_REVIEWS = '/api/v1/reviews/search/'
+
+
+def title_names(client, search):
+    response = client.get(URL_TITLES, {'search': search})
+    assert response.status_code == HTTPStatus.OK
+    return {title['name'] for title in response.json()['results']}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20Search:
+
+    def test_01_titles(self, client):
+        Title.objects.create(name='Война и мир', year=1869,
+                             description='Роман-эпопея')
+        Title.objects.create(name='Мир приключений', year=1990)
+        Title.objects.create(name='Гамлет', year=1600,
+                             description='Трагедия о мире и мести')
+        assert title_names(client, 'мир') == {
+            'Война и мир', 'Мир приключений', 'Гамлет'
+        }, (
+            f'Проверьте, что `{URL_TITLES}?search=` ищет по словам в '
+            'названии и описании, включая начало слова.'
+        )
+        assert title_names(client, 'война мир') == {'Война и мир'}
+        assert title_names(client, 'эпопея') == {'Война и мир'}
+        assert title_names(client, 'комедия') == set()
+
+    def test_02_index_follows_changes(self, client):
+        title = Title.objects.create(name='Война и мир', year=1869)
+        title.name = 'Анна Каренина'
+        title.save()
+        assert title_names(client, 'война') == set()
+        assert title_names(client, 'анна') == {'Анна Каренина'}
+        title.delete()
+        assert title_names(client, 'анна') == set()
+
+    def test_03_reviews_ranked(self, client, user, admin):
+        title = Title.objects.create(name='Произведение', year=2000)
+        Review.objects.create(title=title, author=user, score=5,
+                              text='Скучный сюжет, но хорошая музыка')
+        Review.objects.create(title=title, author=admin, score=9,
+                              text='Сюжет, сюжет и еще раз сюжет')
+        response = client.get(URL_REVIEWS, {'search': 'сюжет'})
+        assert response.status_code == HTTPStatus.OK
+        results = response.json()['results']
+        assert [review['author'] for review in results] == [
+            admin.username, user.username
+        ], 'Проверьте, что лучшие совпадения возвращаются первыми.'
+        assert results[0]['title'] == 'Произведение'
+
+        response = client.get(URL_REVIEWS, {'search': 'музык'})
+        assert [review['author'] for review in response.json()['results']] \
+            == [user.username]
+
+        assert client.get(URL_REVIEWS).status_code == HTTPStatus.BAD_REQUEST
+
+    def test_04_rebuild(self, client):
+        Title.objects.create(name='Война и мир', year=1869)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO reviews_title_fts(reviews_title_fts) "
+                "VALUES ('delete-all')"
+            )
+        assert title_names(client, 'война') == set()
+        call_command('rebuild_search_index', '--optimize')
+        assert title_names(client, 'война') == {'Война и мир'}
+
+    def test_05_parallel_import(self, client):
+        # Триггеры индекса на время загрузки снимаются: иначе процессы
+        # import_files получают 'database is locked'.
+        call_command('import_files', workers=3, batch_size=10)
+        assert Title.objects.count() > 0
+        assert title_names(client, 'побег') == {'Побег из Шоушенка'}, (
+            'Проверьте, что после параллельной загрузки индекс '
+            'перестраивается.'
+        )
+        Title.objects.create(name='Война и мир', year=1869)
+        assert title_names(client, 'война') == {'Война и мир'}, (
+            'Проверьте, что после загрузки триггеры индекса '
+            'восстанавливаются.'
+        )
+
+    def test_06_triggers_restored(self, client):
+        # Так базу оставляет import_files, прерванный во время загрузки.
+        drop_triggers()
+        with triggers_suspended():
+            Title.objects.create(name='Война и мир', year=1869)
+        Title.objects.create(name='Анна Каренина', year=1877)
+        assert title_names(client, 'анна') == {'Анна Каренина'}, (
+            'Проверьте, что после загрузки триггеры индекса создаются, '
+            'даже если их не было до ее начала.'
+        )
+
+        drop_triggers()
+        call_command('rebuild_search_index')
+        Title.objects.create(name='Мир приключений', year=1990)
+        assert title_names(client, 'мир') == {
+            'Война и мир', 'Мир приключений'
+        }, (
+            'Проверьте, что rebuild_search_index восстанавливает '
+            'триггеры индекса.'
+        )
@@ -0,0 +1,81 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Genre, Title
+
+URL = '/api/v1/titles/'
+
+
+def create_titles():
+    genres = {
+        slug: Genre.objects.create(name=slug, slug=slug)
+        for slug in ('drama', 'melodrama', 'comedy')
+    }
+    films = Category.objects.create(name='Фильмы', slug='films')
+    books = Category.objects.create(name='Книги', slug='books')
+    for name, category, slugs in (
+        ('Драма', films, ('drama',)),
+        ('Мелодрама', films, ('melodrama',)),
+        ('Комедия', books, ('comedy',)),
+        ('Трагикомедия', books, ('drama', 'comedy')),
+    ):
+        title = Title.objects.create(name=name, year=2000, category=category)
+        title.genre.set([genres[slug] for slug in slugs])
+
+
+def names(client, **params):
+    response = client.get(URL, params)
+    assert response.status_code == HTTPStatus.OK
+    return sorted(title['name'] for title in response.json()['results'])
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21SlugFilters:
+
+    def test_01_exact_genre(self, client):
+        create_titles()
+        assert names(client, genre='drama') == ['Драма', 'Трагикомедия'], (
+            f'Проверьте, что `{URL}?genre=` сравнивает slug жанра целиком.'
+        )
+        assert names(client, genre='dram') == []
+
+    def test_02_multiple_genres(self, client):
+        create_titles()
+        assert names(client, genre='drama,comedy') == [
+            'Драма', 'Комедия', 'Трагикомедия'
+        ]
+        assert names(
+            client, genre='drama,comedy', genre_mode='all'
+        ) == ['Трагикомедия']
+        assert names(client, genre='drama,unknown', genre_mode='all') == []
+        assert client.get(
+            URL, {'genre': 'drama', 'genre_mode': 'some'}
+        ).status_code == HTTPStatus.BAD_REQUEST
+
+    def test_03_category(self, client):
+        create_titles()
+        assert names(client, category='films') == ['Драма', 'Мелодрама']
+        assert names(client, category='films,books') == [
+            'Драма', 'Комедия', 'Мелодрама', 'Трагикомедия'
+        ]
+        assert names(client, category='film') == []
+
+    def test_04_cached_slug_map(self, client):
+        create_titles()
+        names(client, genre='drama')
+        with CaptureQueriesContext(connection) as context:
+            names(client, genre='comedy')
+        assert not any(
+            query['sql'].startswith('SELECT "reviews_genre"."slug"')
+            for query in context.captured_queries
+        ), 'Проверьте, что slug жанров не загружаются на каждый запрос.'
+
+        Genre.objects.create(name='Ужасы', slug='horror')
+        title = Title.objects.create(name='Оно', year=1990)
+        title.genre.set(Genre.objects.filter(slug='horror'))
+        assert names(client, genre='horror') == ['Оно'], (
+            'Проверьте, что новый жанр доступен в фильтре сразу.'
+        )
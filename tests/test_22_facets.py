@@ -0,0 +1,64 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Genre, Title
+from tests.test_21_slug_filters import create_titles
+from tests.utils import assert_max_queries
+
+URL = '/api/v1/titles/'
+# Запросы списка, по одному запросу с GROUP BY на фасет и загрузка
+# словарей slug жанров и категорий.
+FACETS_MAX_QUERIES = 4 + 3 + 2
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22Facets:
+
+    def test_01_facets(self, client):
+        create_titles()
+        Title.objects.filter(name='Комедия').update(year=1995)
+        with assert_max_queries(URL, FACETS_MAX_QUERIES):
+            response = client.get(
+                URL, {'facets': 'genre,category,year', 'genre': 'drama,comedy'}
+            )
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['facets'] == {
+            'genre': {'drama': 2, 'comedy': 2},
+            'category': {'films': 1, 'books': 2},
+            'year': {'1990': 1, '2000': 2},
+        }, (
+            f'Проверьте, что `{URL}?facets=` возвращает количество '
+            'отфильтрованных произведений по жанрам, категориям '
+            'и десятилетиям.'
+        )
+
+    def test_02_without_facets(self, client):
+        create_titles()
+        assert 'facets' not in client.get(URL).json()
+        assert client.get(
+            URL, {'facets': 'author'}
+        ).status_code == HTTPStatus.BAD_REQUEST
+
+    def test_03_cached_per_filters(self, client):
+        create_titles()
+        client.get(URL, {'facets': 'genre', 'category': 'films'})
+        with assert_max_queries(URL, 4) as context:
+            response = client.get(
+                URL, {'facets': 'genre', 'category': 'films', 'page': 1}
+            )
+        assert not any(
+            'GROUP BY' in query['sql'] for query in context.captured_queries
+        ), 'Проверьте, что фасеты кэшируются для набора фильтров.'
+        assert response.json()['facets']['genre'] == {
+            'drama': 1, 'melodrama': 1
+        }
+
+        title = Title.objects.get(name='Драма')
+        title.genre.add(Genre.objects.get(slug='comedy'))
+        response = client.get(
+            URL, {'facets': 'genre', 'category': 'films', 'page': 1}
+        )
+        assert response.json()['facets']['genre'] == {
+            'drama': 1, 'melodrama': 1, 'comedy': 1
+        }, 'Проверьте, что фасеты обновляются при изменении произведений.'
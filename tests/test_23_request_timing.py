@@ -0,0 +1,62 @@
+import re
+
+import pytest
+from django.test import Client
+from rest_framework.serializers import BaseSerializer
+
+from api.metrics import routes
+from reviews.models import Title
+
+
+@pytest.fixture(autouse=True)
+def reset_routes():
+    routes.reset()
+    yield
+    routes.reset()
+
+
+def parse_server_timing(header):
+    return {
+        metric.split(';')[0]: metric for metric in header.split(', ')
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23RequestTiming:
+
+    def test_01_server_timing(self, client):
+        Title.objects.create(name='Произведение', year=2000)
+        response = client.get('/api/v1/titles/')
+        metrics = parse_server_timing(response['Server-Timing'])
+        assert set(metrics) == {'db', 'serializer', 'view', 'total'}, (
+            'Проверьте, что ответ содержит заголовок Server-Timing.'
+        )
+        queries = int(re.search(r'desc="(\d+) queries"', metrics['db'])[1])
+        assert queries > 0
+
+        stats = routes.snapshot()['api:titles-list']
+        assert stats['count'] == 1
+        assert stats['queries'] == queries
+        assert sum(stats['buckets'].values()) == 1
+        assert stats['serializer_time'] > 0
+        assert all(
+            method.__module__ == 'rest_framework.serializers'
+            for method in (BaseSerializer.is_valid, BaseSerializer.data.fget)
+        ), (
+            'Проверьте, что время сериализаторов учитывается без подмены '
+            'методов DRF во всем процессе.'
+        )
+
+    def test_02_routes_are_bounded(self, client, settings):
+        settings.REQUEST_TIMING_MAX_ROUTES = 1
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/genres/')
+        client.get('/api/v1/categories/')
+        assert routes.snapshot().keys() == {'api:titles-list', 'other'}
+        assert routes.snapshot()['other']['count'] == 2
+
+    def test_03_disabled(self, settings):
+        settings.REQUEST_TIMING_ENABLED = False
+        response = Client().get('/api/v1/titles/')
+        assert not response.has_header('Server-Timing')
+        assert routes.snapshot() == {}
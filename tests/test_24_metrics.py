@@ -0,0 +1,146 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from http import HTTPStatus
+
+import pytest
+from rest_framework.test import APIClient
+
+from api.metrics import ARCHIVE_NAME, registry
+from tests.test_15_authentication import get_client
+
+URL = '/api/metrics'
+REMOTE = {'REMOTE_ADDR': '10.0.0.1'}
+
+
+@pytest.fixture(autouse=True)
+def reset_registry():
+    registry.reset()
+    yield
+    registry.reset()
+
+
+def get_sample(text, name, **labels):
+    for line in text.splitlines():
+        match = re.fullmatch(rf'{name}\{{(.*)\}} (\S+)', line)
+        if match and all(
+            f'{label}="{value}"' in match[1]
+            for label, value in labels.items()
+        ):
+            return float(match[2])
+    return None
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24Metrics:
+
+    def test_01_access(self, client, user, admin):
+        assert client.get(URL).status_code == HTTPStatus.OK, (
+            f'Проверьте, что `{URL}` доступен с локального адреса.'
+        )
+        assert APIClient().get(
+            URL, HTTP_X_FORWARDED_FOR='10.0.0.1'
+        ).status_code in (HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN)
+        assert APIClient().get(URL, **REMOTE).status_code in (
+            HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN
+        ), f'Проверьте, что `{URL}` недоступен анонимным клиентам.'
+        assert get_client(user).get(
+            URL, **REMOTE
+        ).status_code == HTTPStatus.FORBIDDEN
+        assert get_client(admin).get(URL, **REMOTE).status_code == (
+            HTTPStatus.OK
+        )
+
+    def test_02_requests(self, client):
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        response = client.get(URL)
+        assert response['Content-Type'].startswith('text/plain')
+        text = response.content.decode()
+        assert get_sample(
+            text, 'yamdb_http_requests_total',
+            action='TitleViewSet.list', method='GET', status='200'
+        ) == 2
+        assert get_sample(
+            text, 'yamdb_http_request_duration_seconds_bucket',
+            action='TitleViewSet.list', le='+Inf'
+        ) == 2
+        assert get_sample(
+            text, 'yamdb_db_queries_total', action='TitleViewSet.list'
+        ) > 0
+        assert get_sample(
+            text, 'yamdb_cache_requests_total', cache='response',
+            result='hit'
+        ) == 1
+        assert '# TYPE yamdb_http_request_duration_seconds histogram' in text
+
+    def test_03_throttled(self, client, settings):
+        settings.THROTTLE_RATES = {'signup': {'anon': '1/hour'}}
+        for _ in range(3):
+            client.post('/api/v1/auth/signup/')
+        text = client.get(URL).content.decode()
+        assert get_sample(
+            text, 'yamdb_throttled_requests_total', scope='signup'
+        ) == 2
+
+    def test_04_multiprocess(self, client, settings, tmp_path):
+        settings.METRICS_MULTIPROCESS_DIR = str(tmp_path)
+        (tmp_path / '1.json').write_text(json.dumps([
+            ['yamdb_import_rows_total', [['model', 'Title']], 30],
+        ]))
+        client.get('/api/v1/genres/')
+        registry.flush()
+        text = client.get(URL).content.decode()
+        assert get_sample(
+            text, 'yamdb_import_rows_total', model='Title'
+        ) == 30, 'Проверьте, что метрики других процессов суммируются.'
+        assert get_sample(
+            text, 'yamdb_http_requests_total', action='GenreViewSet.list'
+        ) == 1
+
+    def test_05_flush_without_request_timing(self, client, settings,
+                                             tmp_path):
+        settings.METRICS_MULTIPROCESS_DIR = str(tmp_path)
+        settings.METRICS_FLUSH_INTERVAL = 0
+        settings.REQUEST_TIMING_ENABLED = False
+        client.get('/api/v1/genres/')
+        assert (tmp_path / f'{os.getpid()}.json').exists(), (
+            'Проверьте, что метрики сохраняются для других процессов '
+            'и при REQUEST_TIMING_ENABLED = False.'
+        )
+
+    def test_06_dead_processes_archived(self, client, settings, tmp_path):
+        settings.METRICS_MULTIPROCESS_DIR = str(tmp_path)
+        process = subprocess.Popen([sys.executable, '-c', ''])
+        process.wait()
+        dead = tmp_path / f'{process.pid}.json'
+        for _ in range(2):
+            dead.write_text(json.dumps([
+                ['yamdb_import_rows_total', [['model', 'Title']], 30],
+            ]))
+            text = client.get(URL).content.decode()
+            assert not dead.exists(), (
+                'Проверьте, что файлы завершившихся процессов удаляются.'
+            )
+        assert get_sample(
+            text, 'yamdb_import_rows_total', model='Title'
+        ) == 60, (
+            'Проверьте, что значения завершившихся процессов '
+            'продолжают учитываться.'
+        )
+
+        registry.flush()
+        registry.shutdown()
+        assert sorted(path.name for path in tmp_path.glob('*.json')) == [
+            ARCHIVE_NAME
+        ]
+        registry.reset()
+        text = client.get(URL).content.decode()
+        assert get_sample(
+            text, 'yamdb_http_requests_total', action='metrics'
+        ) >= 2, (
+            'Проверьте, что при выходе процесс переносит свои значения '
+            f'в {ARCHIVE_NAME}.'
+        )
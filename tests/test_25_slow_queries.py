@@ -0,0 +1,115 @@
+import json
+import logging
+import re
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review, Title
+
+
+class ListHandler(logging.Handler):
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(json.loads(record.getMessage()))
+
+
+@pytest.fixture
+def slow_queries(settings):
+    settings.SLOW_QUERY_THRESHOLD_MS = 0
+    handler = ListHandler()
+    logger = logging.getLogger('api.slow_queries')
+    handlers = logger.handlers
+    # Файловый обработчик из LOGGING в тестах не нужен.
+    logger.handlers = [handler]
+    yield handler.records
+    logger.handlers = handlers
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25SlowQueries:
+
+    def test_01_logged_with_plan(self, client, user, slow_queries):
+        title = Title.objects.create(name='Произведение', year=2000)
+        Review.objects.create(title=title, author=user, text='Отзыв', score=5)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        slow_queries.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        queries = int(re.search(
+            r'desc="(\d+) queries"', response['Server-Timing']
+        )[1])
+        assert queries == len(context.captured_queries), (
+            'Проверьте, что EXPLAIN не учитывается как запрос вьюсета.'
+        )
+        assert len(slow_queries) == queries
+        record = slow_queries[0]
+        assert record['view'] == 'ReviewViewSet.list'
+        assert record['sql'].startswith('SELECT')
+        assert record['plan'], (
+            'Проверьте, что в журнал записывается план запроса.'
+        )
+        assert all(record['params'] is None for record in slow_queries), (
+            'Проверьте, что параметры запросов по умолчанию не записываются.'
+        )
+        assert 'AuthorListSerializer' in {
+            record['serializer'] for record in slow_queries
+        }
+
+    def test_02_disabled(self, client, settings, slow_queries):
+        settings.SLOW_QUERY_THRESHOLD_MS = None
+        client.get('/api/v1/titles/')
+        assert slow_queries == []
+
+    def test_03_without_request_timing(self, client, settings,
+                                       slow_queries):
+        settings.REQUEST_TIMING_ENABLED = False
+        settings.SLOW_QUERY_LOG_PARAMS = True
+        title = Title.objects.create(name='Произведение', year=2000)
+        slow_queries.clear()
+        response = client.get(f'/api/v1/titles/{title.id}/')
+        assert 'Server-Timing' not in response
+        assert slow_queries, (
+            'Проверьте, что журнал медленных запросов не зависит '
+            'от REQUEST_TIMING_ENABLED.'
+        )
+        assert slow_queries[0]['view'] is None
+        assert [title.id] in [
+            record['params'] for record in slow_queries
+        ], 'Проверьте, что SLOW_QUERY_LOG_PARAMS включает запись параметров.'
+
+    def test_04_management_command(self, slow_queries):
+        call_command('recalculate_counters')
+        assert slow_queries, (
+            'Проверьте, что медленные запросы команд manage.py '
+            'тоже записываются.'
+        )
+
+    def test_05_summary(self, tmp_path, capsys):
+        log = tmp_path / 'slow_queries.log'
+        records = [
+            {'sql': 'SELECT 1', 'duration_ms': 120.0, 'view': 'A.list',
+             'plan': ['SCAN reviews_title']},
+            {'sql': 'SELECT 1', 'duration_ms': 150.0, 'view': 'A.list',
+             'plan': ['SCAN reviews_title']},
+            {'sql': 'SELECT 2', 'duration_ms': 200.0, 'view': 'B.list',
+             'plan': None},
+        ]
+        (tmp_path / 'slow_queries.log.1').write_text(
+            json.dumps(records[0]) + '\n'
+        )
+        log.write_text(
+            '\n'.join(json.dumps(record) for record in records[1:]) + '\n'
+        )
+        call_command('summarize_slow_queries', '--log', str(log), '--json')
+        summary = json.loads(capsys.readouterr().out)
+        assert [group['sql'] for group in summary] == ['SELECT 1', 'SELECT 2']
+        assert summary[0]['count'] == 2
+        assert summary[0]['max_ms'] == 150.0
+        assert summary[0]['full_scan'] is True
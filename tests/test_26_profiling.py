@@ -0,0 +1,64 @@
+import pstats
+import re
+
+import pytest
+
+from tests.test_15_authentication import get_client
+
+URL = '/api/v1/titles/'
+
+
+@pytest.fixture
+def profiles(settings, tmp_path):
+    settings.PROFILING_DIR = tmp_path
+    return tmp_path
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26Profiling:
+
+    def test_01_admin_header(self, admin, profiles):
+        response = get_client(admin).get(URL, HTTP_X_PROFILE='1')
+        filename = response['X-Profile-File']
+        assert re.fullmatch(r'TitleViewSet\.list\.\d+\.prof', filename), (
+            'Проверьте, что профиль сохраняется с именем действия вьюсета.'
+        )
+        stats = pstats.Stats(str(profiles / filename))
+        assert any(
+            function == 'list' for _, _, function in stats.stats
+        )
+
+    def test_02_header_requires_admin(self, user, client, profiles):
+        response = get_client(user).get(URL, HTTP_X_PROFILE='1')
+        assert not response.has_header('X-Profile-File')
+        response = client.get(URL, HTTP_X_PROFILE='1')
+        assert not response.has_header('X-Profile-File')
+        assert list(profiles.iterdir()) == [], (
+            'Проверьте, что заголовок X-Profile учитывается только '
+            'для администратора.'
+        )
+
+    def test_03_sampling(self, admin, profiles):
+        response = get_client(admin).get(URL, HTTP_X_PROFILE='sampling')
+        path = profiles / response['X-Profile-File']
+        assert path.suffix == '.collapsed'
+        lines = path.read_text().splitlines()
+        assert lines
+        for line in lines:
+            stack, count = line.rsplit(' ', 1)
+            assert int(count) > 0
+            assert all(
+                re.fullmatch(r'.+:.+:\d+', frame)
+                for frame in stack.split(';')
+            )
+
+    def test_04_sample_rate(self, client, settings, profiles):
+        settings.PROFILING_SAMPLE_RATE = 1
+        response = client.get(URL)
+        assert not response.has_header('X-Profile-File')
+        assert [path.name.split('.')[:2] for path in profiles.iterdir()] == [
+            ['TitleViewSet', 'list']
+        ]
+        settings.PROFILING_SAMPLE_RATE = 0
+        client.get(URL)
+        assert len(list(profiles.iterdir())) == 1
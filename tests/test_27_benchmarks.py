@@ -0,0 +1,113 @@
+import json
+import random
+from collections import Counter
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count
+
+from benchmarks.data import ZipfSampler
+from benchmarks.suite import SCENARIOS, percentile
+from reviews.models import Comment, Review, Title
+from users.models import User
+
+DATA = {
+    'users': 60, 'titles': 30, 'reviews': 400, 'comments': 200,
+    'genres': 5, 'categories': 3,
+}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27Benchmarks:
+
+    def test_01_zipf_sampler(self):
+        sampler = ZipfSampler(100, 1.1, random.Random(0))
+        ranks = Counter(sampler() for _ in range(10000))
+        assert set(ranks) <= set(range(1, 101))
+        assert ranks[1] > ranks[2] > ranks[10] > ranks[100], (
+            'Проверьте, что меньшие номера выпадают чаще.'
+        )
+
+    def test_02_percentile(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50.5
+        assert percentile(values, 99) == pytest.approx(99.01)
+        assert percentile([7], 95) == 7
+
+    def test_03_generate_data(self):
+        call_command('generate_data', seed=1, **DATA)
+        assert User.objects.count() == DATA['users']
+        assert Title.objects.count() == DATA['titles']
+        assert Comment.objects.count() == DATA['comments']
+        reviews = Review.objects.count()
+        assert reviews == DATA['reviews'], (
+            'Проверьте, что generate_data создает заданное число отзывов.'
+        )
+        titles = list(Title.objects.annotate(
+            actual=Count('reviews')
+        ).order_by('pk'))
+        assert titles[0].actual > titles[-1].actual, (
+            'Проверьте, что отзывы распределяются по закону Ципфа: '
+            'у первых произведений их больше.'
+        )
+        assert all(title.rating_count == title.actual for title in titles), (
+            'Проверьте, что generate_data пересчитывает рейтинги.'
+        )
+        assert all(title.genre.exists() for title in titles)
+
+    def test_04_run_benchmarks(self, tmp_path):
+        call_command('generate_data', seed=1, **DATA)
+        counts = (User.objects.count(), Review.objects.count())
+        output = tmp_path / 'report.json'
+        call_command('run_benchmarks', requests=5, warmup=1, output=output)
+        report = json.loads(output.read_text())
+        assert report['dataset']['titles'] == DATA['titles']
+        assert set(report['scenarios']) == set(SCENARIOS)
+        for name, summary in report['scenarios'].items():
+            assert summary['requests'] == 5
+            assert summary['errors'] == 0, (
+                f'Проверьте, что запросы сценария {name} выполняются '
+                f'без ошибок.'
+            )
+            assert (summary['p50_ms'] <= summary['p95_ms']
+                    <= summary['p99_ms'] <= summary['max_ms'])
+            assert summary['queries_per_request'] >= 0
+        assert (User.objects.count(), Review.objects.count()) == counts, (
+            'Проверьте, что данные, созданные сценариями, откатываются.'
+        )
+
+    def test_05_run_benchmarks_baseline(self, tmp_path):
+        call_command('generate_data', seed=1, **DATA)
+        baseline = tmp_path / 'baseline.json'
+        call_command('run_benchmarks', requests=3, warmup=0,
+                     scenarios=['reviews_list'], output=baseline)
+        report = json.loads(baseline.read_text())
+        report['scenarios']['reviews_list']['p95_ms'] /= 100
+        baseline.write_text(json.dumps(report))
+        with pytest.raises(CommandError):
+            call_command('run_benchmarks', requests=3, warmup=0,
+                         scenarios=['reviews_list'], baseline=baseline,
+                         max_regression=50, output=tmp_path / 'new.json')
+
+    def test_06_run_benchmarks_without_data(self):
+        with pytest.raises(CommandError):
+            call_command('run_benchmarks', requests=1)
+
+    def test_07_benchmark_token_not_throttled(self, settings):
+        settings.THROTTLE_RATES = {
+            **settings.THROTTLE_RATES, 'token': {'anon': '2/hour'}
+        }
+        stdout = StringIO()
+        call_command('benchmark_token', requests=5, stdout=stdout)
+        lines = stdout.getvalue().splitlines()
+        assert len(lines) == 2
+        for line in lines:
+            assert line.endswith('failed 0.'), (
+                'Проверьте, что на время замера лимиты частоты запросов '
+                'сняты.'
+            )
+        assert not User.objects.exists(), (
+            'Проверьте, что пользователи замера удаляются.'
+        )